@@ -0,0 +1,4 @@
+"""
+Offline micro-benchmarks for the scraper hot paths.
+Run from the amazon_scraper directory: python -m benchmarks.run_benchmarks
+"""
@@ -0,0 +1,267 @@
+"""
+Offline micro-benchmarks for card extraction, parsing helpers and output writers.
+Uses the HTML fixtures and synthetic product batches, no network or Chrome needed.
+
+Timings are compared relative to a fixed reference workload timed alongside each
+benchmark, so a baseline recorded on one machine still holds on a slower or busier one.
+The suite runs several rounds; the best value of each metric counts, and the spread
+between rounds is added to the tolerance as a noise margin.
+
+    python -m benchmarks.run_benchmarks                    # compare with baseline.json
+    python -m benchmarks.run_benchmarks --update-baseline  # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from scrapers.html_parser import parse_listing_cards, parse_product_detail
+from scrapers.normalize import normalize_records
+from scrapers.records import build_products
+from utils.helper import Helpers
+from utils.output_writer import StreamingCsvWriter
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCHMARK_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+CATEGORY_URL = 'https://www.amazon.in/gp/bestsellers/electronics'
+
+# Whether a larger value of a metric is better
+HIGHER_IS_BETTER = {
+    'us_per_product': False,
+    'ns_per_call': False,
+    'rows_per_sec': True,
+    'relative': False,
+    'peak_kib': False
+}
+
+# Metrics compared with the baseline; absolute timings depend on the machine and are only printed
+COMPARED_METRICS = ('relative', 'peak_kib')
+
+REFERENCE_TEXT = '  Wireless Bluetooth Earbuds with Mic (Model 12)  ₹1,299.00  (45% off)  4.3 out of 5 stars  '
+REFERENCE_PATTERN = re.compile(r'\d[\d,]*')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def reference_workload(iterations=1000):
+    """Fixed stdlib-only work (regex, string and dict operations) that benchmarks are timed against
+
+    Never change it without re-recording the baseline.
+    """
+    rows = []
+    for i in range(iterations):
+        text = REFERENCE_TEXT.strip().lower()
+        rows.append({'i': i, 'number': REFERENCE_PATTERN.search(text).group(), 'words': text.split()})
+    return rows
+
+
+def measure(func, repeat):
+    """Best wall time of `repeat` calls, that time relative to the reference workload, and peak traced memory
+
+    The reference runs right before each call, so both see the same machine load
+    """
+    best = best_reference = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reference_workload()
+        best_reference = min(best_reference, time.perf_counter() - start)
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, best / best_reference, peak / 1024
+
+
+def synthetic_batch(size):
+    """A batch of products shaped like a real listing page"""
+    raw_cards = [
+        {
+            'asin': f"B0{i:08d}",
+            'name': f"  Wireless Bluetooth Earbuds with Mic   (Model {i})  ",
+            'price': f"{1299 + i:,}",
+            'savings': f"({i % 90}% off)",
+            'rating': '4.3 out of 5 stars',
+            'reviews': f"{i * 37:,}"
+        }
+        for i in range(size)
+    ]
+    return build_products(raw_cards, CATEGORY_URL)
+
+
+def bench_extraction(repeat):
+    listing = load_fixture('bestseller_listing.html')
+    detail = load_fixture('product_detail.html')
+    cards = len(parse_listing_cards(listing))
+    results = {}
+    
+    seconds, relative, peak = measure(lambda: build_products(parse_listing_cards(listing), CATEGORY_URL), repeat)
+    results['listing_page'] = {'us_per_product': seconds / cards * 1e6, 'relative': relative, 'peak_kib': peak}
+    
+    raw_cards = parse_listing_cards(listing)
+    seconds, relative, peak = measure(lambda: build_products(raw_cards, CATEGORY_URL), repeat)
+    results['build_products'] = {'us_per_product': seconds / cards * 1e6, 'relative': relative, 'peak_kib': peak}
+    
+    seconds, relative, peak = measure(lambda: parse_product_detail(detail), repeat)
+    results['product_detail'] = {'us_per_product': seconds * 1e6, 'relative': relative, 'peak_kib': peak}
+    return results
+
+
+def bench_helpers(repeat, calls=10000):
+    inputs = {
+        'parse_price': '₹1,29,999.00',
+        'parse_discount': '(67% off)',
+        'parse_count': '12,345',
+        'clean_text': '  Wireless Bluetooth   Earbuds\n with Mic  '
+    }
+    results = {}
+    for name, value in inputs.items():
+        helper = getattr(Helpers, name)
+        seconds, relative, _ = measure(lambda: [helper(value) for _ in range(calls)], repeat)
+        results[name] = {'ns_per_call': seconds / calls * 1e9, 'relative': relative}
+    return results
+
+
+def bench_writers(repeat, rows):
+    batch = synthetic_batch(rows)
+    directory = tempfile.mkdtemp()
+    results = {}
+    try:
+        def save_to_csv():
+            filename = os.path.join(directory, 'helpers.csv')
+            if os.path.exists(filename):
+                os.remove(filename)
+            Helpers.save_to_csv(batch, filename)
+        
+        def streaming_csv():
+            filename = os.path.join(directory, 'streaming.csv')
+            if os.path.exists(filename):
+                os.remove(filename)
+            with StreamingCsvWriter(filename, 'bench') as writer:
+                writer.write_rows(batch)
+        
+        for name, func in (('save_to_csv', save_to_csv), ('streaming_csv', streaming_csv)):
+            seconds, relative, peak = measure(func, repeat)
+            results[name] = {'rows_per_sec': rows / seconds, 'relative': relative, 'peak_kib': peak}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_normalize(repeat, rows):
+    records = list(synthetic_batch(rows))
+    seconds, relative, peak = measure(lambda: normalize_records(records), repeat)
+    return {'records': {'us_per_product': seconds / rows * 1e6, 'relative': relative, 'peak_kib': peak}}
+
+
+def run_suite(args):
+    return {
+        'extraction': bench_extraction(args.repeat),
+        'helpers': bench_helpers(args.repeat),
+        'normalize': bench_normalize(max(1, args.repeat // 4), args.rows),
+        'writers': bench_writers(max(1, args.repeat // 4), args.rows)
+    }
+
+
+def best_of(rounds):
+    """Best value of every metric over the rounds"""
+    results = {}
+    for group, benchmarks in rounds[0].items():
+        results[group] = {}
+        for name, metrics in benchmarks.items():
+            results[group][name] = {}
+            for metric in metrics:
+                values = [result[group][name][metric] for result in rounds]
+                results[group][name][metric] = max(values) if HIGHER_IS_BETTER[metric] else min(values)
+    return results
+
+
+def noise_margins(rounds):
+    """Relative spread of each benchmark's relative timing between rounds"""
+    margins = {}
+    for group, benchmarks in rounds[0].items():
+        for name in benchmarks:
+            values = [result[group][name]['relative'] for result in rounds]
+            margins[(group, name)] = (max(values) - min(values)) / min(values)
+    return margins
+
+
+def compare(results, baseline, tolerance, margins=None):
+    """List metrics that are worse than the baseline by more than `tolerance` plus the benchmark's noise margin"""
+    margins = margins or {}
+    regressions = []
+    for group, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            for metric, value in metrics.items():
+                reference = baseline.get(group, {}).get(name, {}).get(metric)
+                if metric not in COMPARED_METRICS or not reference:
+                    continue
+                if HIGHER_IS_BETTER[metric]:
+                    change = (reference - value) / reference
+                else:
+                    change = (value - reference) / reference
+                # Memory peaks are deterministic, only timings get the noise margin
+                allowed = tolerance + (margins.get((group, name), 0) if metric == 'relative' else 0)
+                if change > allowed:
+                    regressions.append(
+                        f"{group}.{name}.{metric}: {value:.2f} vs baseline {reference:.2f} "
+                        f"({change:+.0%}, allowed {allowed:+.0%})"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per benchmark, the best one counts')
+    parser.add_argument('--rounds', type=int, default=3, help='runs of the whole suite, the best value of each metric counts')
+    parser.add_argument('--rows', type=int, default=20000, help='rows written by the writer benchmarks')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before failing')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    args = parser.parse_args()
+    
+    rounds = [run_suite(args) for _ in range(max(1, args.rounds))]
+    results = best_of(rounds)
+    margins = noise_margins(rounds)
+    
+    for group, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            line = ', '.join(f"{metric}={value:,.2f}" for metric, value in metrics.items())
+            print(f"{group}.{name}: {line}, noise={margins[(group, name)]:.0%}")
+    
+    if args.update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 0
+    
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline yet, run with --update-baseline")
+        return 0
+    
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, margins)
+    if regressions:
+        print("\nREGRESSIONS against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,20 +14,40 @@ __updated__ = '2024-12-17 20:37:46'
 # Make configuration variables available at package level
 from .credentials import (
     AMAZON_CREDENTIALS,
+    SESSION_CONFIG,
     SELENIUM_CONFIG,
+    HTTP_CONFIG,
+    CACHE_CONFIG,
+    ASIN_INDEX_CONFIG,
+    PRICE_HISTORY_CONFIG,
+    ENRICHMENT_CONFIG,
+    BROWSER_SERVICE_CONFIG,
+    DISTRIBUTED_CONFIG,
+    LOGGING_CONFIG,
     SCRAPING_CONFIG,
     OUTPUT_CONFIG,
     CATEGORIES,
+    CATEGORY_TREE_CONFIG,
     BASE_URL,
     BESTSELLER_URL
 )
 
 __all__ = [
     'AMAZON_CREDENTIALS',
+    'SESSION_CONFIG',
     'SELENIUM_CONFIG',
+    'HTTP_CONFIG',
+    'CACHE_CONFIG',
+    'ASIN_INDEX_CONFIG',
+    'PRICE_HISTORY_CONFIG',
+    'ENRICHMENT_CONFIG',
+    'BROWSER_SERVICE_CONFIG',
+    'DISTRIBUTED_CONFIG',
+    'LOGGING_CONFIG',
     'SCRAPING_CONFIG',
     'OUTPUT_CONFIG',
     'CATEGORIES',
+    'CATEGORY_TREE_CONFIG',
     'BASE_URL',
     'BESTSELLER_URL'
 ]
@@ -1,133 +1,327 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+import argparse
 import os
 import logging
+import threading
+from datetime import datetime
 from config.credentials import (
     AMAZON_CREDENTIALS,
-    OUTPUT_CONFIG
+    SELENIUM_CONFIG,
+    SCRAPING_CONFIG,
+    OUTPUT_CONFIG,
+    ENRICHMENT_CONFIG,
+    CATEGORIES,
+    CATEGORY_TREE_CONFIG
 )
 from utils.auth import AmazonAuth
+from utils.browser_service import attach_driver, release_driver
+from utils.driver import create_driver
+from utils.driver_pool import DriverPool
+from utils.fetcher import HttpFetcher
+from utils.frontier import CrawlFrontier
 from utils.helper import Helpers
+from utils.metrics import metrics
+from utils.output_writer import FanOutWriter, OUTPUT_FIELDS, StreamingCsvWriter, open_output_writer
+from utils.page_cache import open_page_cache
+from utils.rate_controller import rate_controller
+from utils.asin_index import open_asin_index
+from utils.price_history import open_price_history
+from utils.session_store import open_session_store
+from utils.task_queue import open_task_queue
+from scrapers.async_crawler import AsyncCrawler
+from scrapers.category_tree import load_category_tree
+from scrapers.distributed import Coordinator, Worker
+from scrapers.enrichment import EnrichmentPipeline
+from scrapers.normalize import normalize_records, record_failures
 from scrapers.product_scraper import ProductScraper
+from scrapers.records import DETAIL_FIELDS
 
 class AmazonBestSellerScraper:
     def __init__(self):
         self.setup_driver()
         self.helpers = Helpers()
         self.auth = AmazonAuth(self.driver)
-        self.scraper = ProductScraper(self.driver)
-
-    def setup_driver(self):
-        """Setup Chrome driver with options"""
-        chrome_options = Options()
-        
-        # Basic options
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        # Handle WebGL and GPU errors
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--disable-software-rasterizer')
-        chrome_options.add_argument('--disable-webgl')
-        chrome_options.add_argument('--enable-unsafe-swiftshader')
-        
-        # Handle SSL errors
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--allow-insecure-localhost')
-        
-        # Other necessary options
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-notifications')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--start-maximized')
-        
-        # Set user agent
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        # Remove automation flags
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Initialize the driver
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=chrome_options
+        self.page_cache = open_page_cache()
+        self.asin_index = open_asin_index()
+        self.price_history = open_price_history()
+        self.fetcher = HttpFetcher(cache=self.page_cache) if SCRAPING_CONFIG.get('fetch_mode') == 'http' else None
+        self.scraper = ProductScraper(
+            self.driver,
+            fetcher=self.fetcher,
+            page_cache=self.page_cache,
+            asin_index=self.asin_index
         )
-        
-        # Set timeouts
-        self.driver.set_page_load_timeout(30)
-        self.driver.implicitly_wait(10)
-        
-        # Delete cookies
-        self.driver.delete_all_cookies()
-
-
-
+        self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.writer = None
+        self.detail_writer = None
+        self.frontier = None
+        self.task_queue = None
 
+    def setup_driver(self):
+        """Setup Chrome driver with options, reusing the warm browser service when it is running"""
+        self.driver = attach_driver() or create_driver()
 
-    def run(self):
-        """Main execution method"""
+    def run(self, mode='local'):
+        """Main execution method; mode 'coordinator' hands the pages to workers on the task queue"""
         try:
-            # Create output directory if it doesn't exist
-            os.makedirs(OUTPUT_CONFIG['directory'], exist_ok=True)
-            
-            # Setup logging
-            self.helpers.setup_logging(
-                os.path.join(OUTPUT_CONFIG['directory'], 'scraper.log')
-            )
-            
+            self.setup_output()
             logging.info("Starting Amazon Best Sellers scraper")
             
             # Initialize list for all products
             all_products = []
             
-            # Login to Amazon
-            if not self.auth.login(
+            # Login to Amazon, reusing the cached session when possible
+            if not self.auth.ensure_login(
                 AMAZON_CREDENTIALS['email'],
-                AMAZON_CREDENTIALS['password']
+                AMAZON_CREDENTIALS['password'],
+                session_store=open_session_store()
             ):
                 logging.error("Failed to login. Exiting...")
                 return
             
+            # Share the logged in session with the HTTP fetcher
+            if self.fetcher:
+                self.fetcher.load_cookies(self.driver.get_cookies())
+            
+            # Resume the last unfinished run, completed pages are not fetched again
+            self.frontier = CrawlFrontier(
+                os.path.join(OUTPUT_CONFIG['directory'], OUTPUT_CONFIG['frontier_file'])
+            )
+            self.run_id = self.frontier.start_run(self.run_id)
+            self.scraper.frontier = self.frontier
+            
             # Get categories
-            categories = self.scraper.get_categories()
+            categories = self.frontier.get_categories()
             if not categories:
-                logging.error("Failed to get categories. Exiting...")
-                return
+                categories = self.get_categories()
+                if not categories:
+                    logging.error("Failed to get categories. Exiting...")
+                    return
+                self.frontier.set_categories(categories)
+            
+            # Pages stream their new rows into the writer as they are scraped
+            self.writer = open_output_writer(self.run_id, resume=self.frontier.resumed)
+            
+            # Detail enrichment receives each page's rows next to the listing output
+            if ENRICHMENT_CONFIG['enabled']:
+                enriched = StreamingCsvWriter(
+                    os.path.join(OUTPUT_CONFIG['directory'], ENRICHMENT_CONFIG['csv_file']),
+                    self.run_id,
+                    fieldnames=OUTPUT_FIELDS + DETAIL_FIELDS,
+                    resume=self.frontier.resumed
+                )
+                if self.price_history:
+                    # Seller details are recorded with the next price change
+                    enriched = FanOutWriter([enriched, self.price_history])
+                if mode == 'coordinator':
+                    # Product pages become detail tasks for the workers
+                    self.detail_writer = enriched
+                else:
+                    enrichment = EnrichmentPipeline(
+                        enriched,
+                        page_cache=self.page_cache,
+                        asin_index=self.asin_index
+                    )
+                    self.writer = FanOutWriter([self.writer, enrichment])
+            if self.price_history:
+                # Last, so it is closed after the enrichment still writing to it
+                self.writer = FanOutWriter([self.writer, self.price_history])
+            self.scraper.writer = self.writer
+            
+            lock = threading.Lock()
+            
+            def collect(category, products):
+                with lock:
+                    all_products.extend(products)
+                    logging.info(f"Found {len(products)} products in {category['name']}")
+                # Make each finished category durable
+                self.writer.checkpoint()
             
-            # Scrape products from each category
-            for category in categories:
-                logging.info(f"Scraping category: {category['name']}")
-                products = self.scraper.scrape_category(
-                    category['url'],
-                    max_products=50,  # Reduced for faster processing
+            pool_size = SELENIUM_CONFIG.get('pool_size', 1)
+            if mode == 'coordinator':
+                # Workers on any node claim the pages, results come back through the queue
+                self.task_queue = open_task_queue()
+                Coordinator(
+                    self.task_queue,
+                    self.run_id,
+                    self.writer,
+                    detail_writer=self.detail_writer,
+                    asin_index=self.asin_index
+                ).run(
+                    categories,
+                    collect,
+                    max_products=50,
                     min_discount=50
                 )
-                
-                all_products.extend(products)
-                
-                # Save after each category
-                self.helpers.save_to_csv(
-                    all_products,
-                    os.path.join(OUTPUT_CONFIG['directory'], OUTPUT_CONFIG['csv_file'])
+            elif SCRAPING_CONFIG.get('engine') == 'async':
+                # Browserless concurrent crawl, paced by the rate limiter
+                crawler = AsyncCrawler(
+                    fetcher=self.fetcher,
+                    writer=self.writer,
+                    frontier=self.frontier,
+                    asin_index=self.asin_index
                 )
-                
-                logging.info(f"Found {len(products)} products in {category['name']}")
-                self.helpers.random_delay(1, 2)
+                crawler.run(
+                    categories,
+                    collect,
+                    max_products=50,
+                    min_discount=50
+                )
+            elif pool_size > 1:
+                # Scrape categories on a pool of drivers
+                DriverPool(
+                    pool_size,
+                    writer=self.writer,
+                    frontier=self.frontier,
+                    page_cache=self.page_cache,
+                    asin_index=self.asin_index,
+                    scraper=self.scraper
+                ).scrape_categories(
+                    categories,
+                    collect,
+                    max_products=50,
+                    min_discount=50
+                )
+            else:
+                # Scrape products from each category
+                for category in categories:
+                    logging.info(f"Scraping category: {category['name']}")
+                    products = self.scraper.scrape_category(
+                        category['url'],
+                        max_products=50,  # Reduced for faster processing
+                        min_discount=50
+                    )
+                    
+                    # Save after each category
+                    collect(category, products)
+                    if not rate_controller.enabled:
+                        self.helpers.random_delay(1, 2)
             
+            self.frontier.finish_run()
             logging.info(f"Scraping completed. Total products: {len(all_products)}")
+            if OUTPUT_CONFIG.get('normalized_file') and all_products:
+                self.save_normalized(all_products)
             
         except Exception as e:
             logging.error(f"Scraper failed: {str(e)}")
             
         finally:
-            self.driver.quit()
-            logging.info("Scraper finished")
+            self.close()
+
+    def run_worker(self, worker_id=None):
+        """Serve tasks from the shared queue until the coordinator's runs are done"""
+        try:
+            self.setup_output()
+            logging.info("Starting Amazon Best Sellers worker")
+            
+            if not self.auth.ensure_login(
+                AMAZON_CREDENTIALS['email'],
+                AMAZON_CREDENTIALS['password'],
+                session_store=open_session_store()
+            ):
+                logging.error("Failed to login. Exiting...")
+                return
+            if self.fetcher:
+                self.fetcher.load_cookies(self.driver.get_cookies())
+            
+            self.task_queue = open_task_queue()
+            Worker(self.task_queue, self.scraper, worker_id).run()
+            
+        except Exception as e:
+            logging.error(f"Worker failed: {str(e)}")
+            
+        finally:
+            self.close()
+
+    def setup_output(self):
+        """Create the output directory and start logging to it"""
+        os.makedirs(OUTPUT_CONFIG['directory'], exist_ok=True)
+        self.helpers.setup_logging(
+            os.path.join(OUTPUT_CONFIG['directory'], 'scraper.log')
+        )
+
+    def close(self):
+        """Flush outputs, record stats and metrics, and release the browser"""
+        if self.writer:
+            self.writer.close()
+        if self.detail_writer:
+            self.detail_writer.close()
+        if self.task_queue:
+            self.task_queue.close()
+        if self.frontier:
+            self.frontier.close()
+        if self.asin_index:
+            logging.info(f"Duplicate products avoided: {self.asin_index.stats()}")
+            for name, value in self.asin_index.stats().items():
+                metrics.set_gauge('asin_index', value, stat=name)
+            self.asin_index.close()
+        if self.price_history:
+            for name, value in self.price_history.stats().items():
+                metrics.set_gauge('price_history', value, stat=name)
+            self.price_history.close()
+        if self.page_cache:
+            cache_stats = self.page_cache.stats()
+            logging.info(f"Page cache stats: {cache_stats}")
+            for name, value in cache_stats.items():
+                metrics.set_gauge('page_cache', value, stat=name)
+            self.page_cache.close()
+        self.export_metrics()
+        if self.fetcher:
+            self.fetcher.close()
+        release_driver(self.driver)
+        logging.info("Scraper finished")
+
+    def get_categories(self):
+        """Categories to crawl: the CATEGORIES subtrees of the cached category tree"""
+        if CATEGORY_TREE_CONFIG['enabled'] and self.fetcher:
+            try:
+                tree = load_category_tree(self.fetcher)
+                # None of the configured names found, fall back to the top level
+                categories = tree.select(CATEGORIES) or tree.select()
+                if categories:
+                    logging.info(f"Selected {len(categories)} categories from the category tree")
+                    return categories
+            except Exception as e:
+                logging.error(f"Category tree discovery failed: {str(e)}")
+        # Top level only, read in the browser
+        return self.scraper.get_categories()
+
+    def save_normalized(self, products):
+        """Write the run's products with typed price, discount, rating and review columns"""
+        try:
+            with metrics.timer('normalize'):
+                df, failures = normalize_records(products)
+            record_failures(failures)
+            df.to_csv(os.path.join(OUTPUT_CONFIG['directory'], OUTPUT_CONFIG['normalized_file']), index=False)
+        except Exception as e:
+            logging.error(f"Failed to save normalized products: {str(e)}")
+
+    def export_metrics(self):
+        """Write the run's metrics as a JSON summary and a Prometheus textfile"""
+        try:
+            directory = OUTPUT_CONFIG['directory']
+            metrics.export_json(
+                os.path.join(directory, OUTPUT_CONFIG['metrics_file'].format(run_id=self.run_id))
+            )
+            metrics.export_prometheus(os.path.join(directory, OUTPUT_CONFIG['prometheus_file']))
+            summary = metrics.summary()
+            logging.info(
+                f"Throughput: {summary['pages_per_sec']} pages/sec, "
+                f"{summary['products_per_sec']} products/sec"
+            )
+        except Exception as e:
+            logging.error(f"Failed to export metrics: {str(e)}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape discounted Amazon best sellers")
+    role = parser.add_mutually_exclusive_group()
+    role.add_argument('--coordinator', action='store_true', help="queue the crawl for workers and collect their results")
+    role.add_argument('--worker', action='store_true', help="claim and run tasks from the shared queue")
+    parser.add_argument('--worker-id', help="name of this worker in task leases (default: host-pid)")
+    args = parser.parse_args()
+    
     scraper = AmazonBestSellerScraper()
-    scraper.run()
+    if args.worker:
+        scraper.run_worker(args.worker_id)
+    else:
+        scraper.run('coordinator' if args.coordinator else 'local')
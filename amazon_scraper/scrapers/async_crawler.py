@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config.credentials import SCRAPING_CONFIG
+from utils.fetcher import HttpFetcher
+from utils.metrics import metrics
+from utils.rate_limit import RateLimiter
+from scrapers.html_parser import parse_document, parse_listing_cards, has_next_page
+from scrapers.records import build_products
+from scrapers.filters import ProductFilter, EarlyStopPolicy
+
+class AsyncCrawler:
+    """asyncio crawl scheduler for listing pages, throttled by a token bucket rate limiter"""
+
+    def __init__(self, fetcher=None, concurrency=None, limiter=None, writer=None, frontier=None,
+                 asin_index=None):
+        rate_config = SCRAPING_CONFIG['rate_limit']
+        self.writer = writer
+        self.frontier = frontier
+        self.asin_index = asin_index
+        self.owns_fetcher = fetcher is None
+        self.fetcher = fetcher or HttpFetcher()
+        self.concurrency = concurrency or SCRAPING_CONFIG.get('concurrency', 8)
+        self.limiter = limiter or RateLimiter(
+            rate_config['global_rps'],
+            rate_config['per_host_rps'],
+            rate_config.get('burst')
+        )
+        # Blocking fetches and parsing run here, asyncio only schedules them
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.semaphore = None
+
+    async def fetch_page_resumable(self, category_url, page, product_filter=None):
+        """fetch_page, but served from the crawl frontier when the page was already completed"""
+        if not self.frontier:
+            return await self.fetch_page(category_url, page, product_filter)
+        
+        done = self.frontier.get_done_page(category_url, page)
+        if done is not None:
+            logging.info(f"Page {page} already completed, skipping fetch")
+            metrics.inc('pages_total', source='frontier')
+            return done
+        
+        self.frontier.mark_in_flight(category_url, page)
+        result = await self.fetch_page(category_url, page, product_filter)
+        if result is None:
+            self.frontier.mark_pending(category_url, page)
+        else:
+            self.frontier.mark_done(category_url, page, *result)
+        return result
+
+    async def fetch_page(self, category_url, page, product_filter=None):
+        """Fetch and parse one listing page, returns (products, has_next) or None on failure"""
+        url = f"{category_url}?pg={page}"
+        await self.limiter.acquire(url)
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            content = await loop.run_in_executor(self.executor, self.fetcher.fetch, url)
+            if content is None:
+                return None
+            return await loop.run_in_executor(
+                self.executor, self._parse_page, content, category_url, page, product_filter
+            )
+
+    def _parse_page(self, content, category_url, page, product_filter=None):
+        with metrics.timer('extraction'):
+            doc = parse_document(content)
+            raw_cards = parse_listing_cards(doc)
+            if not raw_cards:
+                logging.warning(f"No product cards in static HTML for page {page} of {category_url}")
+                metrics.inc('page_failures_total', reason='no_cards')
+                return None
+            logging.info(f"Found {len(raw_cards)} products on page {page}")
+            metrics.inc('pages_total', source='http')
+            return build_products(raw_cards, category_url, self.asin_index, product_filter), has_next_page(doc)
+
+    async def crawl_category(self, category_url, max_products=1500, min_discount=50):
+        """Scrape products from a category, same records as ProductScraper.scrape_category"""
+        products = []
+        page = 1
+        product_filter = ProductFilter.from_config(min_discount=min_discount)
+        early_stop = EarlyStopPolicy(max_products)
+        
+        while True:
+            try:
+                result = await self.fetch_page_resumable(category_url, page, product_filter)
+            except Exception as e:
+                logging.error(f"Error scraping page {page}: {str(e)}")
+                break
+            if result is None:
+                break
+            page_products, has_next = result
+            products.extend(page_products)
+            if self.writer and page_products:
+                self.writer.write_rows(page_products)
+            if not has_next or early_stop.should_stop(page_products.matches, len(products)):
+                break
+            page += 1
+        
+        logging.info(f"Successfully scraped {len(products)} products from category")
+        return products
+
+    async def crawl(self, categories, on_result, **scrape_kwargs):
+        """Crawl all categories concurrently, calling on_result(category, products) as each one finishes"""
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def crawl_one(category):
+            logging.info(f"Scraping category: {category['name']}")
+            products = await self.crawl_category(category['url'], **scrape_kwargs)
+            on_result(category, products)
+        
+        await asyncio.gather(*(crawl_one(category) for category in categories))
+
+    def run(self, categories, on_result, **scrape_kwargs):
+        """Blocking entry point for the crawl"""
+        try:
+            asyncio.run(self.crawl(categories, on_result, **scrape_kwargs))
+        finally:
+            self.executor.shutdown(wait=True)
+            if self.owns_fetcher:
+                self.fetcher.close()
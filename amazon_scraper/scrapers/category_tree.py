@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from config.credentials import BESTSELLER_URL, CATEGORY_TREE_CONFIG
+from utils.metrics import metrics
+from utils.page_cache import normalize_url
+from scrapers.html_parser import parse_categories
+
+ROOT_ID = 'root'
+
+
+def node_id(url):
+    """Stable node ID from a bestseller URL: the path below /bestsellers/, e.g. 'electronics/1389401031'"""
+    path = urlsplit(normalize_url(url)).path
+    _, _, below = path.partition('/bestsellers')
+    return below.strip('/') or ROOT_ID
+
+
+class CategoryTree:
+    """Bestseller category tree; nodes are category dicts with id, parent and depth added"""
+
+    def __init__(self, nodes, discovered_at=None, max_depth=None):
+        self.nodes = {node['id']: node for node in nodes}
+        self.discovered_at = discovered_at or time.time()
+        self.max_depth = max_depth
+
+    def children(self, node_id):
+        return [node for node in self.nodes.values() if node['parent'] == node_id]
+
+    def subtree(self, node_id):
+        """The node and all of its descendants, breadth-first"""
+        nodes = [self.nodes[node_id]]
+        for node in nodes:
+            nodes.extend(self.children(node['id']))
+        return nodes
+
+    def select(self, names=None):
+        """Categories in the subtrees named in `names` (case-insensitive), or the top level when empty"""
+        if not names:
+            return [node for node in self.nodes.values() if node['depth'] == 1]
+
+        by_name = {}
+        for node in self.nodes.values():
+            by_name.setdefault(node['name'].lower(), []).append(node)
+
+        selected = {}
+        for name in names:
+            matches = by_name.get(name.lower())
+            if not matches:
+                logging.warning(f"Category '{name}' not found in the category tree")
+                continue
+            for match in matches:
+                for node in self.subtree(match['id']):
+                    selected.setdefault(node['id'], node)
+        return list(selected.values())
+
+    def save(self, path):
+        """Write the tree as JSON, replacing the previous file atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'discovered_at': self.discovered_at,
+                'max_depth': self.max_depth,
+                'nodes': list(self.nodes.values())
+            }, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, ttl_seconds=None, max_depth=None):
+        """Cached tree, or None when missing, older than ttl_seconds or discovered less deeply than max_depth"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ttl_seconds is not None and time.time() - data['discovered_at'] > ttl_seconds:
+            return None
+        if max_depth is not None and (data.get('max_depth') or 0) < max_depth:
+            return None
+        return cls(data['nodes'], data['discovered_at'], data.get('max_depth'))
+
+
+class CategoryDiscovery:
+    """Walks the bestseller category tree breadth-first, fetching each level concurrently"""
+
+    def __init__(self, fetcher, config=None):
+        self.config = {**CATEGORY_TREE_CONFIG, **(config or {})}
+        self.fetcher = fetcher
+
+    def discover(self, root_url=BESTSELLER_URL):
+        """Discover the tree below root_url down to max_depth levels"""
+        max_depth = self.config['max_depth']
+        root = {'id': ROOT_ID, 'name': 'Best Sellers', 'url': normalize_url(root_url), 'parent': None, 'depth': 0}
+        nodes = [root]
+        # Category pages repeat their ancestors and siblings in the nav tree,
+        # links to nodes already seen are not children
+        seen = {ROOT_ID}
+        level = [root]
+
+        with ThreadPoolExecutor(max_workers=self.config['concurrency']) as executor:
+            for depth in range(1, max_depth + 1):
+                if not level or len(nodes) >= self.config['max_nodes']:
+                    break
+                pages = executor.map(lambda node: self.fetcher.fetch(node['url'], 'categories'), level)
+
+                next_level = []
+                for parent, page in zip(level, pages):
+                    if page is None:
+                        logging.error(f"Failed to fetch category page {parent['url']}")
+                        continue
+                    for category in parse_categories(page, limit=None):
+                        category_id = node_id(category['url'])
+                        if category_id in seen or len(nodes) >= self.config['max_nodes']:
+                            continue
+                        seen.add(category_id)
+                        node = {
+                            'id': category_id,
+                            'name': category['name'],
+                            'url': normalize_url(category['url']),
+                            'parent': parent['id'],
+                            'depth': depth
+                        }
+                        nodes.append(node)
+                        next_level.append(node)
+
+                logging.info(f"Discovered {len(next_level)} categories at depth {depth}")
+                level = next_level
+
+        metrics.set_gauge('category_tree_nodes', len(nodes) - 1)
+        return CategoryTree(nodes, max_depth=max_depth)
+
+
+def load_category_tree(fetcher, config=None):
+    """Category tree from the cache, rediscovered once it is older than the TTL"""
+    config = {**CATEGORY_TREE_CONFIG, **(config or {})}
+    tree = CategoryTree.load(config['cache_file'], config['ttl_hours'] * 3600, config['max_depth'])
+    if tree:
+        logging.info(f"Loaded category tree with {len(tree.nodes) - 1} categories from cache")
+        return tree
+
+    with metrics.timer('category_discovery'):
+        tree = CategoryDiscovery(fetcher, config).discover()
+    if len(tree.nodes) > 1:
+        tree.save(config['cache_file'])
+    return tree
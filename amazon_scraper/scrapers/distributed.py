@@ -0,0 +1,203 @@
+import logging
+import os
+import socket
+import time
+from config.credentials import BASE_URL, DISTRIBUTED_CONFIG, SCRAPING_CONFIG
+from utils.helper import Helpers
+from utils.metrics import metrics
+from utils.rate_controller import rate_controller
+from scrapers.filters import EarlyStopPolicy, ProductFilter
+from scrapers.records import PageBatch
+
+class Coordinator:
+    """Splits a crawl into page and detail tasks on the shared queue and collects the results"""
+
+    def __init__(self, task_queue, run_id, writer, detail_writer=None, asin_index=None, config=None):
+        self.config = {**DISTRIBUTED_CONFIG, **(config or {})}
+        self.queue = task_queue
+        self.run_id = run_id
+        self.writer = writer
+        self.detail_writer = detail_writer
+        self.asin_index = asin_index
+        self.categories = {}
+
+    def run(self, categories, on_result, max_products=1500, min_discount=50):
+        """Crawl every category through the workers, calling on_result(category, products) as each one finishes"""
+        self.queue.open_run(self.run_id)
+        for category in categories:
+            self.categories[category['url']] = {
+                'category': category,
+                'products': [],
+                'early_stop': EarlyStopPolicy(max_products),
+                'open': True
+            }
+            self._enqueue_page(category['url'], 1, min_discount)
+        logging.info(f"Coordinating run {self.run_id}: {len(categories)} categories queued")
+
+        while True:
+            # Counted before the results are read, so a task completing in between is
+            # still collected before the run is considered done
+            counts = self.queue.counts(self.run_id)
+            results = self.queue.results(self.run_id)
+            for task_id, kind, payload, result in results:
+                try:
+                    if kind == 'page':
+                        self._collect_page(payload, result, on_result)
+                    elif kind == 'detail':
+                        self._collect_detail(result)
+                except Exception as e:
+                    logging.error(f"Failed to collect task {task_id}: {str(e)}")
+                # Acknowledged only once its follow-up tasks are queued, so a restarted
+                # coordinator picks the result up again instead of losing them
+                self.queue.ack(task_id)
+
+            if not results and not counts.get(self.queue.PENDING) and not counts.get(self.queue.LEASED):
+                break
+            time.sleep(self.config['poll_interval'])
+
+        # Categories whose next page failed on every attempt end with what was collected
+        for state in self.categories.values():
+            if state['open']:
+                self._close_category(state, on_result)
+
+        self.queue.finish_run(self.run_id)
+        logging.info(f"Run {self.run_id} finished, tasks by status: {self.queue.counts(self.run_id)}")
+
+    def _enqueue_page(self, category_url, page, min_discount):
+        self.queue.enqueue(
+            self.run_id, 'page', f"{category_url}#{page}",
+            {'category_url': category_url, 'page': page, 'min_discount': min_discount}
+        )
+
+    def _collect_page(self, payload, result, on_result):
+        state = self.categories.get(payload['category_url'])
+        if state is None or not state['open']:
+            return
+
+        batch = PageBatch.from_dicts(result['rows'])
+        if self.asin_index:
+            batch = self._drop_fresh(batch, result.get('fingerprints') or {})
+        state['products'].extend(batch)
+        if len(batch):
+            self.writer.write_rows(batch)
+        metrics.inc('pages_total', source='worker')
+
+        if self.detail_writer:
+            for product in batch:
+                if self.asin_index and not self.asin_index.needs_enrichment(product['asin']):
+                    continue
+                self.queue.enqueue(
+                    self.run_id, 'detail', product['asin'],
+                    {'url': f"{BASE_URL}/dp/{product['asin']}", 'row': product.to_dict()}
+                )
+
+        if result['has_next'] and not state['early_stop'].should_stop(batch.matches, len(state['products'])):
+            self._enqueue_page(payload['category_url'], payload['page'] + 1, payload['min_discount'])
+        else:
+            self._close_category(state, on_result)
+
+    def _drop_fresh(self, batch, fingerprints):
+        # Workers scrape without the ASIN index, a retried page would otherwise find
+        # all of its products fresh and come back empty; recently seen ones are dropped here
+        kept = []
+        for product in batch:
+            fingerprint = fingerprints.get(product['asin'])
+            if self.asin_index.is_fresh(product['asin'], fingerprint):
+                continue
+            kept.append(product)
+            batch.fingerprints[product['asin']] = fingerprint
+        batch.fresh = len(batch.products) - len(kept)
+        batch.products = kept
+        self.asin_index.add(batch, batch.fingerprints)
+        return batch
+
+    def _collect_detail(self, result):
+        row = result['row']
+        self.detail_writer.write_rows([row])
+        if not result.get('enriched'):
+            # Written without details, and tried again by the next run
+            metrics.inc('enrichment_failures_total')
+            return
+        if self.asin_index:
+            self.asin_index.mark_enriched(row['asin'])
+        metrics.inc('products_enriched_total')
+
+    def _close_category(self, state, on_result):
+        state['open'] = False
+        on_result(state['category'], state['products'])
+
+
+class Worker:
+    """Claims tasks from the shared queue and runs them with a ProductScraper"""
+
+    def __init__(self, task_queue, scraper, worker_id=None, config=None):
+        self.config = {**DISTRIBUTED_CONFIG, **(config or {})}
+        self.queue = task_queue
+        self.scraper = scraper
+        # The coordinator skips recently seen products, so a page retried after an expired
+        # lease is not found all fresh; the card fingerprints it needs travel with the rows
+        self.scraper.asin_index = None
+        self.scraper.keep_fingerprints = True
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.completed = 0
+
+    def run(self):
+        """Work until no coordinator has had a run open for idle_timeout seconds"""
+        logging.info(f"Worker {self.worker_id} waiting for tasks")
+        idle_since = time.time()
+        while True:
+            run_id = self.queue.active_run()
+            task = self.queue.claim(run_id, self.worker_id) if run_id else None
+            if task is None:
+                if run_id is None and time.time() - idle_since > self.config['idle_timeout']:
+                    break
+                if run_id:
+                    idle_since = time.time()
+                time.sleep(self.config['poll_interval'])
+                continue
+
+            idle_since = time.time()
+            task_id, kind, payload = task
+            try:
+                with metrics.timer(f"task_{kind}"):
+                    result = self.handle(kind, payload)
+            except Exception as e:
+                logging.error(f"Task {task_id} ({kind}) failed: {str(e)}")
+                result = None
+
+            if result is None:
+                self.queue.fail(task_id, self.worker_id)
+                metrics.inc('tasks_total', kind=kind, status='failed')
+            elif self.queue.complete(task_id, self.worker_id, result):
+                self.completed += 1
+                metrics.inc('tasks_total', kind=kind, status='done')
+            else:
+                logging.error(f"Lease on task {task_id} expired before it completed, result dropped")
+                metrics.inc('tasks_total', kind=kind, status='expired')
+            # Requests are paced by the rate controller when it is enabled
+            if not rate_controller.enabled:
+                Helpers.random_delay(*SCRAPING_CONFIG['delay_range'])
+
+        logging.info(f"Worker {self.worker_id} stopping after {self.completed} tasks")
+
+    def handle(self, kind, payload):
+        """Run one task, returns its result or None when it should be retried"""
+        if kind == 'page':
+            self.scraper.product_filter = ProductFilter.from_config(min_discount=payload['min_discount'])
+            scraped = self.scraper.scrape_page(payload['category_url'], payload['page'])
+            if scraped is None:
+                return None
+            products, has_next = scraped
+            return {
+                'rows': [product.to_dict() for product in products],
+                'fingerprints': products.fingerprints,
+                'has_next': bool(has_next)
+            }
+
+        if kind == 'detail':
+            row = payload['row']
+            enriched = self.scraper.get_detailed_info(payload['url'], row)
+            return {'row': row, 'enriched': enriched}
+
+        logging.error(f"Unknown task kind: {kind}")
+        return None
@@ -0,0 +1,116 @@
+import itertools
+import logging
+import queue
+import threading
+from config.credentials import (
+    AMAZON_CREDENTIALS,
+    BASE_URL,
+    ENRICHMENT_CONFIG,
+    SCRAPING_CONFIG
+)
+from utils.auth import AmazonAuth
+from utils.driver import create_driver
+from utils.fetcher import HttpFetcher
+from utils.helper import Helpers
+from utils.metrics import metrics
+from utils.rate_controller import rate_controller
+from utils.session_store import open_session_store
+from scrapers.product_scraper import ProductScraper
+
+class EnrichmentPipeline:
+    """Fetches seller and description details for listing rows, highest discount first"""
+
+    # Same write_rows/checkpoint/close interface as the output writers, so the
+    # pipeline can sit next to them and receive each page's rows as they arrive
+
+    def __init__(self, writer, workers=None, page_cache=None, asin_index=None, config=None):
+        self.config = {**ENRICHMENT_CONFIG, **(config or {})}
+        self.writer = writer
+        self.page_cache = page_cache
+        self.asin_index = asin_index
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count(1)
+        self.queued = set()
+        self.lock = threading.Lock()
+        self.enriched = 0
+        self.workers = [
+            threading.Thread(target=self._worker, args=(worker_id,), name=f"enrich-worker-{worker_id}", daemon=True)
+            for worker_id in range(workers or self.config['workers'])
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def write_rows(self, rows):
+        """Queue listing rows for enrichment"""
+        with self.lock:
+            for row in rows:
+                asin = row['asin']
+                if asin in self.queued:
+                    continue
+                if self.asin_index and not self.asin_index.needs_enrichment(asin):
+                    continue
+                self.queued.add(asin)
+                self.queue.put((-row['discount'], next(self.sequence), row))
+
+    def checkpoint(self):
+        self.writer.checkpoint()
+
+    def close(self):
+        """Wait for queued rows to be enriched, then close the output"""
+        logging.info(f"Waiting for {self.queue.qsize()} products still queued for enrichment")
+        # Stop markers sort after every real product
+        for _ in self.workers:
+            self.queue.put((float('inf'), next(self.sequence), None))
+        for worker in self.workers:
+            worker.join()
+        self.writer.close()
+        logging.info(f"Enriched {self.enriched} products")
+
+    def _worker(self, worker_id):
+        """Own a fetcher (and a logged in driver when pages need a browser) and enrich rows"""
+        driver = None
+        fetcher = None
+        try:
+            if SCRAPING_CONFIG.get('fetch_mode') == 'http' or not self.config.get('use_browser'):
+                fetcher = HttpFetcher(cache=self.page_cache)
+            if self.config.get('use_browser'):
+                driver = create_driver()
+                auth = AmazonAuth(driver)
+                if not auth.ensure_login(
+                    AMAZON_CREDENTIALS['email'],
+                    AMAZON_CREDENTIALS['password'],
+                    session_store=open_session_store()
+                ):
+                    logging.error(f"Enrichment worker {worker_id} failed to login")
+            scraper = ProductScraper(driver, fetcher=fetcher, page_cache=self.page_cache)
+            
+            while True:
+                _, _, row = self.queue.get()
+                if row is None:
+                    break
+                try:
+                    with metrics.timer('enrichment'):
+                        enriched = scraper.get_detailed_info(f"{BASE_URL}/dp/{row['asin']}", row)
+                    self.writer.write_rows([row])
+                    if enriched:
+                        if self.asin_index:
+                            self.asin_index.mark_enriched(row['asin'])
+                        with self.lock:
+                            self.enriched += 1
+                        metrics.inc('products_enriched_total')
+                    else:
+                        # Written without details, and tried again by the next run
+                        metrics.inc('enrichment_failures_total')
+                except Exception as e:
+                    logging.error(f"Failed to enrich {row['asin']}: {str(e)}")
+                if not rate_controller.enabled:
+                    Helpers.random_delay(*self.config['delay_range'])
+                
+        except Exception as e:
+            logging.error(f"Enrichment worker {worker_id} failed: {str(e)}")
+            
+        finally:
+            if fetcher:
+                fetcher.close()
+            if driver:
+                driver.quit()
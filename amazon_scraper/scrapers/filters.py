@@ -0,0 +1,62 @@
+import re
+from config.credentials import SCRAPING_CONFIG
+
+RATING_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_rating(rating_str):
+    """Extract the star rating from text like '4.3 out of 5 stars'"""
+    match = RATING_PATTERN.search(rating_str or '')
+    return float(match.group()) if match else 0.0
+
+
+class ProductFilter:
+    """Declarative product criteria, checked field by field while a card is extracted"""
+
+    def __init__(self, min_discount=None, min_price=None, max_price=None, min_rating=None, min_reviews=None):
+        self.min_discount = min_discount
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+        self.min_reviews = min_reviews
+
+    @classmethod
+    def from_config(cls, config=None, **overrides):
+        """Filter from SCRAPING_CONFIG['filters'], with explicit arguments taking precedence"""
+        criteria = dict(config if config is not None else SCRAPING_CONFIG.get('filters', {}))
+        criteria.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**criteria)
+
+    def accepts_discount(self, discount):
+        return self.min_discount is None or discount >= self.min_discount
+
+    def accepts_price(self, price):
+        if self.min_price is not None and price < self.min_price:
+            return False
+        return self.max_price is None or price <= self.max_price
+
+    def accepts_rating(self, rating):
+        return self.min_rating is None or rating >= self.min_rating
+
+    def accepts_reviews(self, num_reviews):
+        return self.min_reviews is None or num_reviews >= self.min_reviews
+
+    @property
+    def checks_rating(self):
+        return self.min_rating is not None
+
+
+class EarlyStopPolicy:
+    """Decides when to stop paginating a category"""
+
+    def __init__(self, target, max_empty_pages=None):
+        self.target = target
+        self.max_empty_pages = max_empty_pages or SCRAPING_CONFIG.get('max_empty_pages', 2)
+        self.empty_pages = 0
+
+    def should_stop(self, page_matches, total_matches):
+        """Record a page's number of matching products and check whether to stop"""
+        if total_matches >= self.target:
+            return True
+        self.empty_pages = 0 if page_matches else self.empty_pages + 1
+        return self.empty_pages >= self.max_empty_pages
@@ -0,0 +1,112 @@
+"""
+Offline HTML parsing for Amazon bestseller, category and product pages.
+Works on raw page bytes with lxml, so no browser is needed.
+"""
+
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from urllib.parse import urljoin
+from utils.helper import Helpers
+from scrapers.records import build_products
+from config.credentials import BASE_URL
+
+# Card fields and the selectors they are read from
+CARD_SELECTORS = {
+    'name': "span.a-text-normal",
+    'price': "span.a-price-whole",
+    'savings': "span.a-savings",
+    'rating': "span.a-icon-alt",
+    'reviews': "a[href*='product-reviews'] span.a-size-base"  # The name span is a-size-base too
+}
+
+CATEGORY_SELECTORS = [
+    "div._p13n-zg-nav-tree-all_style_zg-browse-group__88fbz a",
+    "div[role='treeitem'] a"
+]
+
+# Selectors are compiled to XPath once, at import time
+_CARD = CSSSelector("div[data-asin]")
+_CARD_FIELDS = {field: CSSSelector(selector) for field, selector in CARD_SELECTORS.items()}
+_CATEGORY_LINKS = [CSSSelector(selector) for selector in CATEGORY_SELECTORS]
+_NEXT_PAGE = CSSSelector("li.a-last a")
+_SELLER = CSSSelector("#merchant-info")
+_DESCRIPTION = [CSSSelector("#productDescription"), CSSSelector("#feature-bullets")]
+
+
+def parse_document(page, encoding='utf-8'):
+    """Parse raw HTML (bytes or str) into an lxml document"""
+    # Already parsed, lets callers parse once and run several extractors
+    if isinstance(page, lxml_html.HtmlElement):
+        return page
+    if isinstance(page, bytes):
+        parser = lxml_html.HTMLParser(encoding=encoding)
+        return lxml_html.document_fromstring(page, parser=parser)
+    return lxml_html.document_fromstring(page)
+
+
+def _first_text(element, selector):
+    """Text content of the first match of a compiled selector, or None"""
+    matches = selector(element)
+    return matches[0].text_content() if matches else None
+
+
+def parse_categories(page, limit=10, base_url=BASE_URL):
+    """Extract bestseller categories from the bestsellers page"""
+    doc = parse_document(page)
+    for selector in _CATEGORY_LINKS:
+        categories = []
+        for link in selector(doc)[:limit]:
+            name = Helpers.clean_text(link.text_content())
+            url = link.get('href')
+            if not url:
+                continue
+            url = urljoin(base_url, url)
+            if name and 'bestsellers' in url and name != "See More":
+                categories.append({'name': name, 'url': url})
+        if categories:
+            return categories
+    return []
+
+
+def parse_listing_cards(page):
+    """Extract the raw fields of every product card on a listing page"""
+    doc = parse_document(page)
+    raw_cards = []
+    for card in _CARD(doc):
+        asin = card.get('data-asin')
+        # Skip empty elements
+        if not asin:
+            continue
+        raw = {'asin': asin}
+        for field, selector in _CARD_FIELDS.items():
+            raw[field] = _first_text(card, selector)
+        raw_cards.append(raw)
+    return raw_cards
+
+
+def has_next_page(page):
+    """Check whether a listing page links to a next page"""
+    return bool(_NEXT_PAGE(parse_document(page)))
+
+
+def parse_listing(page, category_url):
+    """Extract product records from a listing page"""
+    return build_products(parse_listing_cards(page), category_url)
+
+
+def parse_product_detail(page):
+    """Extract seller and description from a product page"""
+    doc = parse_document(page)
+    details = {}
+    
+    sold_by = _first_text(doc, _SELLER)
+    if sold_by is not None:
+        details['sold_by'] = Helpers.clean_text(sold_by)
+    
+    for selector in _DESCRIPTION:
+        description = _first_text(doc, selector)
+        if description is not None:
+            details['description'] = Helpers.clean_text(description)
+            break
+    
+    return details
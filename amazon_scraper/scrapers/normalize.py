@@ -0,0 +1,76 @@
+import argparse
+import logging
+import pandas as pd
+from utils.helper import PRICE_PATTERN, COUNT_PATTERN, DISCOUNT_PATTERN
+from utils.metrics import metrics
+from scrapers.filters import RATING_PATTERN
+from scrapers.records import records_to_dataframe
+
+# Typed column -> (source fields, first present wins; patterns, first match wins; dtype).
+# Source fields cover both raw card strings and the columns of written output rows,
+# the patterns are the ones the scalar Helpers parsers try, in the same order
+NORMALIZED_COLUMNS = {
+    'price': (('price',), (PRICE_PATTERN.pattern,), 'float64'),
+    'discount': (('savings', 'discount'), (DISCOUNT_PATTERN.pattern, COUNT_PATTERN.pattern), 'Int64'),
+    'rating': (('rating',), (RATING_PATTERN.pattern,), 'float64'),
+    'num_reviews': (('reviews', 'num_reviews'), (COUNT_PATTERN.pattern,), 'Int64')
+}
+
+
+def normalize_cards(raw):
+    """Typed price, discount, rating and review columns from raw strings, with parse failures per column
+
+    raw is a list of card or row dicts, or a DataFrame of them, for a page or a whole run.
+    Returns (frame, failures); a value with text but no number in it is <NA> and counted in failures.
+    """
+    if not isinstance(raw, pd.DataFrame):
+        raw = pd.DataFrame.from_records(raw)
+    frame = pd.DataFrame(index=raw.index)
+    failures = {}
+    for column, (sources, patterns, dtype) in NORMALIZED_COLUMNS.items():
+        source = next((field for field in sources if field in raw), None)
+        if source is None:
+            frame[column] = pd.Series(index=raw.index, dtype=dtype)
+            failures[column] = 0
+            continue
+
+        text = raw[source].astype('string').str.strip()
+        digits = text.str.extract(f"({patterns[0]})", expand=False)
+        for pattern in patterns[1:]:
+            digits = digits.fillna(text.str.extract(f"({pattern})", expand=False))
+        digits = digits.str.replace(',', '', regex=False)
+        frame[column] = pd.to_numeric(digits, errors='coerce').astype(dtype)
+        failures[column] = int((text.fillna('') != '').sum() - frame[column].notna().sum())
+    return frame, failures
+
+
+def normalize_records(records):
+    """DataFrame of product records with typed price, discount, rating and review columns"""
+    df = records_to_dataframe(records)
+    typed, failures = normalize_cards(df[['price', 'discount', 'rating', 'num_reviews']].astype('string'))
+    for column in typed:
+        df[column] = typed[column]
+    return df, failures
+
+
+def record_failures(failures):
+    """Log parse failures and count them in the run metrics, one counter per column"""
+    for column, count in failures.items():
+        if count:
+            metrics.inc('parse_failures_total', count, field=column)
+    if any(failures.values()):
+        logging.info(f"Normalization parse failures by column: {failures}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a typed copy of a crawl's CSV output")
+    parser.add_argument('source', help="CSV written by a crawl, e.g. output/output.csv")
+    parser.add_argument('target', help="where to write the normalized CSV")
+    args = parser.parse_args()
+
+    rows = pd.read_csv(args.source, dtype='string', keep_default_na=False)
+    typed, failures = normalize_cards(rows)
+    for column in typed:
+        rows[column] = typed[column]
+    rows.to_csv(args.target, index=False)
+    print(f"Normalized {len(rows)} rows, parse failures by column: {failures}")
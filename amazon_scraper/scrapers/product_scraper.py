@@ -3,16 +3,57 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from utils.helper import Helpers
+from scrapers.html_parser import (
+    CARD_SELECTORS,
+    parse_document,
+    parse_categories,
+    parse_listing_cards,
+    parse_product_detail,
+    has_next_page
+)
+from scrapers.records import build_products
+from scrapers.filters import ProductFilter, EarlyStopPolicy
+from config.credentials import SCRAPING_CONFIG, SELENIUM_CONFIG, BESTSELLER_URL
+from utils.driver import page_bandwidth
+from utils.metrics import metrics
+from utils.rate_controller import CAPTCHA_CHECK_SCRIPT, rate_controller
+from utils.readiness import PageReadiness
 import logging
 import time
-from datetime import datetime
-import os
+
+# Collects the raw text of every product card in a single execute_script call,
+# so a listing page costs one WebDriver round trip instead of several per card.
+# The selectors are passed in as arguments[0] so the script and the offline
+# parser always read the same fields.
+CARD_EXTRACTION_SCRIPT = """
+const selectors = arguments[0];
+return Array.from(document.querySelectorAll('div[data-asin]'))
+    .filter(card => card.getAttribute('data-asin'))
+    .map(card => {
+        const raw = {asin: card.getAttribute('data-asin')};
+        for (const [field, selector] of Object.entries(selectors)) {
+            const el = card.querySelector(selector);
+            raw[field] = el ? el.textContent : null;
+        }
+        return raw;
+    });
+"""
 
 class ProductScraper:
-    def __init__(self, driver):
+    def __init__(self, driver, extraction_mode=None, fetcher=None, writer=None, frontier=None,
+                 page_cache=None, asin_index=None):
         try:
             self.driver = driver
+            self.asin_index = asin_index
+            self.keep_fingerprints = False
+            self.product_filter = None
+            self.fetcher = fetcher
+            self.page_cache = page_cache
+            self.writer = writer
+            self.frontier = frontier
             self.helpers = Helpers()
+            self.readiness = PageReadiness(driver)
+            self.extraction_mode = extraction_mode or SCRAPING_CONFIG.get('extraction_mode', 'script')
         except Exception as e:
             logging.error(f"Error initializing ProductScraper: {str(e)}")
             raise
@@ -21,11 +62,20 @@ class ProductScraper:
         """Get Amazon bestseller categories"""
         categories = []
         try:
+            # Serve the category list from the page cache when possible
+            cached = self.page_cache.get(BESTSELLER_URL, 'categories') if self.page_cache else None
+            if cached is not None:
+                categories = parse_categories(cached, limit)
+                if categories:
+                    logging.info(f"Loaded {len(categories)} categories from page cache")
+                    return categories
+            
             logging.info("Navigating to Best Sellers page")
             try:
-                self.driver.get('https://www.amazon.in/gp/bestsellers')
+                with metrics.timer('navigation'):
+                    self.driver.get(BESTSELLER_URL)
                 logging.info("Waiting for page to load completely")
-                time.sleep(5)
+                self.readiness.wait('categories')
             except WebDriverException as e:
                 logging.error(f"Failed to navigate to Best Sellers page: {str(e)}")
                 return []
@@ -106,6 +156,7 @@ class ProductScraper:
                 return []
                 
             logging.info(f"Successfully processed {len(categories)} categories")
+            self.cache_page_source(BESTSELLER_URL, 'categories')
             return categories
                 
         except Exception as e:
@@ -121,106 +172,23 @@ class ProductScraper:
         """Scrape products from a category"""
         products = []
         page = 1
+        # Filters are applied while cards are extracted, pages stop once enough match
+        self.product_filter = ProductFilter.from_config(min_discount=min_discount)
+        early_stop = EarlyStopPolicy(max_products)
         
-        while len(products) < max_products:
+        while True:
             try:
-                url = f"{category_url}?pg={page}"
-                logging.info(f"Scraping page {page} of category")
-                
-                try:
-                    self.driver.get(url)
-                except WebDriverException as e:
-                    logging.error(f"Failed to load page {page}: {str(e)}")
-                    break
-                    
-                self.helpers.random_delay(1, 2)
-                
-                # Wait for products to load
-                logging.info("Waiting for products to load...")
-                try:
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-asin]"))
-                    )
-                except TimeoutException:
-                    logging.error("Timeout waiting for products. Moving to next page.")
+                result = self.scrape_page_resumable(category_url, page)
+                retries = SCRAPING_CONFIG.get('page_retries', 0)
+                while result is None and retries:
+                    # The rate controller has backed off by now, give the page another chance
+                    retries -= 1
+                    logging.info(f"Retrying page {page}")
+                    result = self.scrape_page_resumable(category_url, page)
+                if result is None:
+                    logging.error(f"Giving up on page {page}, stopping category after {len(products)} products")
                     break
-                
-                # Get all product elements
-                try:
-                    product_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-asin]")
-                    logging.info(f"Found {len(product_elements)} products on page {page}")
-                except NoSuchElementException:
-                    logging.error("No product elements found")
-                    break
-                
-                page_products = []  # Store products from current page
-                
-                for element in product_elements:
-                    try:
-                        # Skip empty elements
-                        if not element.get_attribute('data-asin'):
-                            continue
-                        
-                        product_data = {
-                            'name': '',
-                            'price': 0.0,
-                            'rating': '',
-                            'num_reviews': 0,
-                            'discount': 0,
-                            'asin': element.get_attribute('data-asin'),
-                            'category': category_url.split('/')[-1],
-                            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        }
-                        
-                        # Get product name
-                        try:
-                            name_element = element.find_element(By.CSS_SELECTOR, "span.a-text-normal")
-                            product_data['name'] = self.helpers.clean_text(name_element.text)
-                            logging.info(f"Found product: {product_data['name'][:50]}...")
-                        except NoSuchElementException:
-                            continue
-                        
-                        # Get price
-                        try:
-                            price_element = element.find_element(By.CSS_SELECTOR, "span.a-price-whole")
-                            product_data['price'] = self.helpers.parse_price(price_element.text)
-                            logging.info(f"Price: {product_data['price']}")
-                        except NoSuchElementException:
-                            pass
-                        
-                        # Get discount
-                        try:
-                            discount_element = element.find_element(By.CSS_SELECTOR, "span.a-savings")
-                            product_data['discount'] = self.helpers.parse_discount(discount_element.text)
-                            logging.info(f"Discount: {product_data['discount']}%")
-                        except NoSuchElementException:
-                            pass
-                        
-                        # Get rating
-                        try:
-                            rating_element = element.find_element(By.CSS_SELECTOR, "span.a-icon-alt")
-                            product_data['rating'] = self.helpers.clean_text(rating_element.text)
-                        except NoSuchElementException:
-                            pass
-                        
-                        # Get number of reviews
-                        try:
-                            reviews_element = element.find_element(By.CSS_SELECTOR, "span.a-size-base")
-                            product_data['num_reviews'] = self.helpers.parse_price(reviews_element.text)
-                        except NoSuchElementException:
-                            pass
-                        
-                        # Add product if it meets criteria
-                        if product_data['name'] and product_data['price'] > 0:
-                            try:
-                                page_products.append(product_data)
-                                logging.info(f"Added product to list")
-                            except Exception as e:
-                                logging.error(f"Failed to add product to list: {str(e)}")
-                        
-                    except Exception as e:
-                        logging.error(f"Error processing product: {str(e)}")
-                        continue
+                page_products, has_next = result
                 
                 # Add page products to main list
                 try:
@@ -229,28 +197,22 @@ class ProductScraper:
                 except Exception as e:
                     logging.error(f"Failed to add page products to main list: {str(e)}")
                 
-                # Save intermediate results
-                if products:
+                # Stream the new rows of this page to the output
+                if self.writer and page_products:
                     try:
-                        os.makedirs('output', exist_ok=True)
-                        self.helpers.save_to_csv(products, 'output/output.csv')
-                        logging.info(f"Saved {len(products)} products to CSV")
+                        self.writer.write_rows(page_products)
                     except Exception as e:
-                        logging.error(f"Failed to save products to CSV: {str(e)}")
+                        logging.error(f"Failed to write products to output: {str(e)}")
                 
                 # Check for next page
-                try:
-                    next_button = self.driver.find_element(By.CSS_SELECTOR, "li.a-last a")
-                    if not next_button.is_enabled():
-                        break
-                    page += 1
-                    logging.info(f"Moving to page {page}")
-                except NoSuchElementException:
-                    logging.info("No next page button found")
+                if not has_next:
                     break
-                except Exception as e:
-                    logging.error(f"Error checking next page: {str(e)}")
+                # Recently seen products still count as matches, a rerun should not stop early
+                if early_stop.should_stop(page_products.matches, len(products)):
+                    logging.info(f"Stopping after page {page}: enough matching products or no recent matches")
                     break
+                page += 1
+                logging.info(f"Moving to page {page}")
                 
             except Exception as e:
                 logging.error(f"Error scraping page {page}: {str(e)}")
@@ -259,16 +221,220 @@ class ProductScraper:
         logging.info(f"Successfully scraped {len(products)} products from category")
         return products
 
+    def scrape_page_resumable(self, category_url, page):
+        """scrape_page, but served from the crawl frontier when the page was already completed"""
+        if not self.frontier:
+            return self.scrape_page(category_url, page)
+        
+        done = self.frontier.get_done_page(category_url, page)
+        if done is not None:
+            logging.info(f"Page {page} already completed, skipping fetch")
+            metrics.inc('pages_total', source='frontier')
+            return done
+        
+        self.frontier.mark_in_flight(category_url, page)
+        result = self.scrape_page(category_url, page)
+        if result is None:
+            self.frontier.mark_pending(category_url, page)
+        else:
+            self.frontier.mark_done(category_url, page, *result)
+        return result
+
+    def scrape_page(self, category_url, page):
+        """Scrape one listing page, returns (products, has_next) or None on failure"""
+        url = f"{category_url}?pg={page}"
+        logging.info(f"Scraping page {page} of category")
+        
+        # Plain HTTP first, the browser is only needed when the page relies on JavaScript
+        if self.fetcher:
+            content = self.fetcher.fetch(url)
+            if content is not None:
+                with metrics.timer('extraction'):
+                    doc = parse_document(content)
+                    raw_cards = parse_listing_cards(doc)
+                    # No cards in the static HTML means they are rendered by JavaScript
+                    if raw_cards:
+                        logging.info(f"Found {len(raw_cards)} products on page {page} (http)")
+                        metrics.inc('pages_total', source='http')
+                        return self.build_products(raw_cards, category_url), has_next_page(doc)
+            logging.info(f"Falling back to browser for page {page}")
+            metrics.inc('browser_fallbacks_total')
+        elif self.page_cache:
+            # Without a fetcher the cache is only consulted here
+            content = self.page_cache.get(url, 'listing')
+            if content is not None:
+                with metrics.timer('extraction'):
+                    doc = parse_document(content)
+                    raw_cards = parse_listing_cards(doc)
+                    logging.info(f"Found {len(raw_cards)} products on page {page} (cache)")
+                    metrics.inc('pages_total', source='cache')
+                    return self.build_products(raw_cards, category_url), has_next_page(doc)
+        
+        try:
+            ready = self.navigate(url, 'listing')
+        except WebDriverException as e:
+            logging.error(f"Failed to load page {page}: {str(e)}")
+            metrics.inc('page_failures_total', reason='navigation')
+            return None
+        
+        if ready is None:
+            # Left pending, so a later attempt picks the page up once the block has passed
+            return None
+        if not ready:
+            logging.error("Timeout waiting for products. Moving to next page.")
+            metrics.inc('page_failures_total', reason='readiness_timeout')
+            return None
+        
+        # Extract all product cards on the page
+        try:
+            with metrics.timer('extraction'):
+                if self.extraction_mode == 'element':
+                    raw_cards = self.extract_cards_elementwise()
+                elif self.extraction_mode == 'html':
+                    raw_cards = self.extract_cards_html()
+                else:
+                    raw_cards = self.extract_cards_script()
+                logging.info(f"Found {len(raw_cards)} products on page {page}")
+                products = self.build_products(raw_cards, category_url)
+        except WebDriverException as e:
+            logging.error(f"Failed to extract product cards: {str(e)}")
+            metrics.inc('page_failures_total', reason='extraction')
+            return None
+        
+        metrics.inc('pages_total', source='browser')
+        self.report_bandwidth(page)
+        # Rendered pages replace any JavaScript-less copy cached by the fetcher
+        self.cache_page_source(url, 'listing')
+        return products, self.check_next_page()
+
+    def navigate(self, url, page_type):
+        """Load a page in the browser, paced by the rate controller
+
+        Returns True once the page is ready, False when it did not become ready in time
+        and None when Amazon answered with a robot check.
+        """
+        rate_controller.acquire()
+        start = time.perf_counter()
+        try:
+            with metrics.timer('navigation'):
+                self.driver.get(url)
+        except WebDriverException:
+            rate_controller.release(rate_controller.ERROR)
+            raise
+        
+        ready = self.readiness.wait(page_type)
+        latency = time.perf_counter() - start
+        try:
+            blocked = bool(self.driver.execute_script(CAPTCHA_CHECK_SCRIPT))
+        except WebDriverException:
+            blocked = False
+        
+        if blocked:
+            rate_controller.release(rate_controller.BLOCKED)
+            logging.error(f"Robot check page instead of {url}")
+            metrics.inc('page_failures_total', reason='captcha')
+            return None
+        # A page that never becomes ready is how throttling shows in the browser
+        rate_controller.release(rate_controller.classify(latency=latency) if ready else rate_controller.SLOW)
+        return ready
+
+    def report_bandwidth(self, page):
+        """Log what the loaded page cost and what the lean profile saved"""
+        lean = SELENIUM_CONFIG['lean_profile']
+        if not (lean['enabled'] and lean['report_savings']):
+            return
+        report = page_bandwidth(self.driver)
+        logging.info(
+            f"Page {page} transferred {report['transferred_bytes'] / 1024:.0f} KB, "
+            f"blocked {report['blocked_requests']} requests "
+            f"(~{report['estimated_bytes_saved'] / 1024:.0f} KB saved)"
+        )
+
+    def cache_page_source(self, url, page_type):
+        """Store the page currently loaded in the browser in the page cache"""
+        if not self.page_cache:
+            return
+        try:
+            self.page_cache.put(url, self.driver.page_source, page_type)
+        except WebDriverException as e:
+            logging.error(f"Failed to read page source for cache: {str(e)}")
+
+    def check_next_page(self):
+        """Check the loaded page for an enabled next page link"""
+        try:
+            next_button = self.driver.find_element(By.CSS_SELECTOR, "li.a-last a")
+            return next_button.is_enabled()
+        except NoSuchElementException:
+            logging.info("No next page button found")
+            return False
+        except Exception as e:
+            logging.error(f"Error checking next page: {str(e)}")
+            return False
+
+    def extract_cards_script(self):
+        """Read the raw fields of every product card in one WebDriver round trip"""
+        return self.driver.execute_script(CARD_EXTRACTION_SCRIPT, CARD_SELECTORS) or []
+
+    def extract_cards_elementwise(self):
+        """Read the raw fields of every product card element by element"""
+        raw_cards = []
+        for element in self.driver.find_elements(By.CSS_SELECTOR, "div[data-asin]"):
+            try:
+                asin = element.get_attribute('data-asin')
+                # Skip empty elements
+                if not asin:
+                    continue
+                
+                raw = {'asin': asin}
+                for field, selector in CARD_SELECTORS.items():
+                    try:
+                        raw[field] = element.find_element(By.CSS_SELECTOR, selector).text
+                    except NoSuchElementException:
+                        raw[field] = None
+                        # Cards without a name are skipped, no need to look further
+                        if field == 'name':
+                            break
+                raw_cards.append(raw)
+            except Exception as e:
+                logging.error(f"Error processing product: {str(e)}")
+                continue
+        return raw_cards
+
+    def extract_cards_html(self):
+        """Parse the raw fields of every product card from one page_source snapshot"""
+        return parse_listing_cards(self.driver.page_source)
+
+    def build_products(self, raw_cards, category_url):
+        """Build product dicts from raw card fields"""
+        return build_products(
+            raw_cards, category_url, self.asin_index, self.product_filter, self.keep_fingerprints
+        )
+
     def get_detailed_info(self, product_url, product_data):
-        """Get additional product details from product page"""
+        """Get additional product details from product page, returns True when seller or description was found"""
         try:
+            if self.fetcher:
+                content = self.fetcher.fetch(product_url, 'product')
+                if content is not None:
+                    details = parse_product_detail(content)
+                    if details:
+                        product_data.update(details)
+                        return self.has_details(product_data)
+                if self.driver is None:
+                    logging.warning(f"No product details in static HTML for {product_url}")
+                    return False
+            elif self.page_cache:
+                cached = self.page_cache.get(product_url, 'product')
+                if cached is not None:
+                    product_data.update(parse_product_detail(cached))
+                    return self.has_details(product_data)
+            
             try:
-                self.driver.get(product_url)
+                if self.navigate(product_url, 'product') is None:
+                    return False
             except WebDriverException as e:
                 logging.error(f"Failed to load product page: {str(e)}")
-                return
-                
-            self.helpers.random_delay(1, 2)
+                return False
 
             # Get seller info
             try:
@@ -293,6 +459,14 @@ class ProductScraper:
                     logging.error(f"Error getting feature bullets: {str(e)}")
             except Exception as e:
                 logging.error(f"Error getting product description: {str(e)}")
+            
+            self.cache_page_source(product_url, 'product')
+            return self.has_details(product_data)
 
         except Exception as e:
             logging.error(f"Failed to get detailed product info: {str(e)}")
+            return False
+
+    @staticmethod
+    def has_details(product_data):
+        return bool(product_data.get('sold_by') or product_data.get('description'))
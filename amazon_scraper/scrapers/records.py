@@ -0,0 +1,257 @@
+from utils.helper import Helpers
+from scrapers.filters import parse_rating
+from utils.metrics import metrics
+from config.credentials import LOGGING_CONFIG
+import logging
+import random
+from collections.abc import Mapping
+from datetime import datetime
+
+# Listing fields, in output order
+PRODUCT_FIELDS = ['name', 'price', 'rating', 'num_reviews', 'discount', 'asin', 'category', 'timestamp']
+
+# Raw fields read from each listing card
+CARD_FIELDS = ['name', 'price', 'savings', 'rating', 'reviews']
+
+# Raw card fields whose change makes a recently seen product worth extracting again
+FINGERPRINT_FIELDS = ['price', 'savings', 'rating']
+
+# Fields filled in later from the product page
+DETAIL_FIELDS = ['sold_by', 'description']
+
+
+class Product(Mapping):
+    """Compact product record; category and timestamp are shared through its PageBatch
+
+    A read-only Mapping plus item assignment, so pandas and other Mapping-aware code
+    accept records like dicts; items, values and == come from the Mapping mixins.
+    """
+
+    __slots__ = ('name', 'price', 'rating', 'num_reviews', 'discount', 'asin', 'batch', 'sold_by', 'description')
+
+    def __init__(self, batch, asin, name, price=0.0, rating='', num_reviews=0, discount=0):
+        self.batch = batch
+        self.asin = asin
+        self.name = name
+        self.price = price
+        self.rating = rating
+        self.num_reviews = num_reviews
+        self.discount = discount
+        self.sold_by = None
+        self.description = None
+
+    @property
+    def category(self):
+        return self.batch.category
+
+    @property
+    def timestamp(self):
+        return self.batch.timestamp
+
+    # Mapping interface, so records work wherever product dicts did
+
+    def keys(self):
+        return PRODUCT_FIELDS + [field for field in DETAIL_FIELDS if getattr(self, field) is not None]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, field):
+        return field in self.keys()
+
+    def __getitem__(self, field):
+        if field not in PRODUCT_FIELDS and field not in DETAIL_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in DETAIL_FIELDS and field not in PRODUCT_FIELDS[:6]:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None) if field in PRODUCT_FIELDS or field in DETAIL_FIELDS else None
+        return default if value is None else value
+
+    def update(self, fields):
+        for field, value in fields.items():
+            self[field] = value
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.keys()}
+
+    def __repr__(self):
+        return f"Product({self.to_dict()!r})"
+
+
+
+class PageBatch:
+    """The products of one listing page, sharing category and crawl timestamp"""
+
+    __slots__ = ('category', 'timestamp', 'products', 'fingerprints', 'fresh')
+
+    def __init__(self, category, timestamp=None):
+        self.category = category
+        self.timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.products = []
+        # Card fingerprint per ASIN, for the ASIN index
+        self.fingerprints = {}
+        # Cards skipped as seen recently; they matched when they were first kept
+        self.fresh = 0
+
+    def add(self, **fields):
+        product = Product(self, **fields)
+        self.products.append(product)
+        return product
+
+    def __len__(self):
+        return len(self.products)
+
+    @property
+    def matches(self):
+        """Cards on the page that match the filters, including those skipped as seen recently"""
+        return len(self.products) + self.fresh
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __getitem__(self, index):
+        return self.products[index]
+
+    @classmethod
+    def from_dicts(cls, rows):
+        """Rebuild a batch from product dicts (all from the same page)"""
+        batch = cls(rows[0]['category'], rows[0]['timestamp']) if rows else cls('')
+        for row in rows:
+            product = batch.add(**{field: row[field] for field in PRODUCT_FIELDS[:6]})
+            for field in DETAIL_FIELDS:
+                if row.get(field) is not None:
+                    product[field] = row[field]
+        return batch
+
+    def to_dicts(self):
+        return [product.to_dict() for product in self.products]
+
+    def to_columns(self):
+        return records_to_columns(self.products)
+
+    def to_arrow(self):
+        return records_to_arrow(self.products)
+
+    def to_dataframe(self):
+        return records_to_dataframe(self.products)
+
+
+def records_to_columns(records, fields=None):
+    """Column lists for a sequence of records, read attribute by attribute without row dicts"""
+    fields = fields or PRODUCT_FIELDS + DETAIL_FIELDS
+    return {field: [getattr(record, field) for record in records] for field in fields}
+
+
+def records_to_arrow(records):
+    """pyarrow Table of records; category is dictionary encoded since it repeats per page"""
+    import pyarrow as pa
+    columns = records_to_columns(records)
+    columns['category'] = pa.array(columns['category']).dictionary_encode()
+    return pa.table(columns)
+
+
+def records_to_dataframe(records):
+    """pandas DataFrame of records, with category as a categorical column"""
+    import pandas as pd
+    df = pd.DataFrame(records_to_columns(records))
+    df['category'] = df['category'].astype('category')
+    return df
+
+
+def card_fingerprint(raw):
+    """Raw price, savings and rating strings of a card, compared without parsing them"""
+    return '|'.join(raw.get(field) or '' for field in FINGERPRINT_FIELDS)
+
+
+def build_products(raw_cards, category_url, asin_index=None, product_filter=None, keep_fingerprints=False):
+    """Build a PageBatch of products from raw card fields, with their card fingerprints when indexed or asked for"""
+    # Cards are dropped as early as possible: known unchanged ASINs before any parsing,
+    # filtered fields as soon as they are parsed, before the record is built
+    batch = PageBatch(category_url.split('/')[-1])
+    
+    # Fields a selector found nothing for, counted once per page
+    for field in CARD_FIELDS:
+        misses = sum(1 for raw in raw_cards if raw.get(field) is None)
+        if misses:
+            metrics.inc('selector_misses_total', misses, field=field)
+    
+    # Per-product lines are sampled DEBUG output; the level is checked once per page
+    sample_rate = LOGGING_CONFIG['product_sample_rate'] if logging.getLogger().isEnabledFor(logging.DEBUG) else 0
+    fresh = filtered = invalid = 0
+    keep_fingerprints = keep_fingerprints or asin_index is not None
+    fingerprint = None
+    
+    for raw in raw_cards:
+        try:
+            if keep_fingerprints:
+                fingerprint = card_fingerprint(raw)
+            # Price changes still come through, so the price history sees them
+            if asin_index and asin_index.is_fresh(raw['asin'], fingerprint):
+                fresh += 1
+                continue
+            
+            discount = Helpers.parse_discount(raw['savings']) if raw.get('savings') else 0
+            if product_filter and not product_filter.accepts_discount(discount):
+                filtered += 1
+                continue
+            
+            price = Helpers.parse_price(raw['price']) if raw.get('price') else 0.0
+            # Add product only if it has a price
+            if price <= 0:
+                invalid += 1
+                continue
+            if product_filter and not product_filter.accepts_price(price):
+                filtered += 1
+                continue
+            
+            if product_filter and product_filter.checks_rating:
+                if not product_filter.accepts_rating(parse_rating(raw.get('rating'))):
+                    filtered += 1
+                    continue
+            
+            num_reviews = Helpers.parse_count(raw['reviews']) if raw.get('reviews') else 0
+            if product_filter and not product_filter.accepts_reviews(num_reviews):
+                filtered += 1
+                continue
+            
+            name = Helpers.clean_text(raw.get('name'))
+            if not name:
+                invalid += 1
+                continue
+            
+            batch.add(
+                asin=raw['asin'],
+                name=name,
+                price=price,
+                rating=Helpers.clean_text(raw.get('rating')),
+                num_reviews=num_reviews,
+                discount=discount
+            )
+            if keep_fingerprints:
+                batch.fingerprints[raw['asin']] = fingerprint
+            if sample_rate and random.random() < sample_rate:
+                logging.debug(f"Added product {raw['asin']}: {name[:50]}, price {price}, discount {discount}%")
+                
+        except Exception as e:
+            invalid += 1
+            logging.error(f"Error processing product: {str(e)}")
+            continue
+    
+    batch.fresh = fresh
+    logging.info(
+        f"Kept {len(batch)} of {len(raw_cards)} cards in {batch.category} "
+        f"(seen recently: {fresh}, filtered: {filtered}, incomplete: {invalid})"
+    )
+    if asin_index:
+        asin_index.add(batch, batch.fingerprints)
+    metrics.inc('products_total', len(batch))
+    return batch
@@ -0,0 +1,67 @@
+"""
+Parsed fields of the offline HTML parser against the benchmark fixtures.
+
+    cd amazon_scraper
+    python -m pytest tests
+"""
+
+import os
+from scrapers.html_parser import has_next_page, parse_listing, parse_listing_cards, parse_product_detail
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+CATEGORY_URL = 'https://www.amazon.in/gp/bestsellers/electronics'
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def test_listing_cards():
+    cards = parse_listing_cards(load_fixture('bestseller_listing.html'))
+    assert len(cards) == 50
+    # A card without rating, reviews or savings
+    assert cards[0] == {
+        'asin': 'B043464097',
+        'name': 'Smart Fitness Band (Model 0)',
+        'price': '26,074',
+        'savings': None,
+        'rating': None,
+        'reviews': None
+    }
+    assert cards[1] == {
+        'asin': 'B012633920',
+        'name': 'Cotton Bath Towel Set (Model 1)',
+        'price': '38,392',
+        'savings': '(19% off)',
+        'rating': '4.0 out of 5 stars',
+        'reviews': '4,914'
+    }
+
+
+def test_reviews_not_read_from_name():
+    # The name span shares the a-size-base class, reviews must come from the ratings link
+    for card in parse_listing_cards(load_fixture('bestseller_listing.html')):
+        assert card['reviews'] is None or card['reviews'].replace(',', '').isdigit()
+
+
+def test_listing_records():
+    products = parse_listing(load_fixture('bestseller_listing.html'), CATEGORY_URL)
+    by_asin = {product['asin']: product for product in products}
+    towel = by_asin['B012633920']
+    assert towel['price'] == 38392.0
+    assert towel['discount'] == 19
+    assert towel['num_reviews'] == 4914
+    assert towel['category'] == 'electronics'
+    assert by_asin['B043464097']['num_reviews'] == 0
+
+
+def test_next_page():
+    assert has_next_page(load_fixture('bestseller_listing.html'))
+
+
+def test_product_detail():
+    assert parse_product_detail(load_fixture('product_detail.html')) == {
+        'sold_by': 'Sold by Appario Retail Private Ltd and Fulfilled by Amazon.',
+        'description': 'Compact earbuds with 13mm drivers, dual microphones and touch controls.'
+    }
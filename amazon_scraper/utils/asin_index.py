@@ -0,0 +1,115 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from config.credentials import ASIN_INDEX_CONFIG
+
+class AsinIndex:
+    """Persistent index of scraped ASINs, used to skip unchanged products seen within a freshness window"""
+
+    def __init__(self, db_path, freshness_seconds):
+        self.freshness_seconds = freshness_seconds
+        self.duplicates_skipped = 0
+        self.enrichments_skipped = 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS asins (
+                asin TEXT PRIMARY KEY,
+                category TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                enriched_at REAL,
+                fingerprint TEXT
+            )
+        """)
+        # Indexes created before fingerprints were recorded
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(asins)")]
+        if 'fingerprint' not in columns:
+            self.conn.execute("ALTER TABLE asins ADD COLUMN fingerprint TEXT")
+        self.conn.commit()
+        
+        # Membership checks run per card, so the fresh part of the index is held in memory
+        cutoff = time.time() - freshness_seconds
+        self.last_seen = {}
+        self.fingerprints = {}
+        for asin, last_seen, fingerprint in self.conn.execute(
+            "SELECT asin, last_seen, fingerprint FROM asins WHERE last_seen >= ?", (cutoff,)
+        ):
+            self.last_seen[asin] = last_seen
+            self.fingerprints[asin] = fingerprint
+        self.enriched = dict(self.conn.execute(
+            "SELECT asin, enriched_at FROM asins WHERE enriched_at >= ?", (cutoff,)
+        ))
+        logging.info(f"ASIN index loaded with {len(self.last_seen)} fresh products")
+
+    def is_fresh(self, asin, fingerprint=None):
+        """True when the ASIN was extracted within the freshness window with the same fingerprint, counting it as a skipped duplicate"""
+        seen_at = self.last_seen.get(asin)
+        # A changed price, discount or rating is news even within the window
+        if fingerprint is not None and self.fingerprints.get(asin) != fingerprint:
+            return False
+        if seen_at is not None and time.time() - seen_at <= self.freshness_seconds:
+            self.duplicates_skipped += 1
+            return True
+        return False
+
+    def add(self, products, fingerprints=None):
+        """Record extracted products as seen now, with the card fingerprints they were extracted from"""
+        now = time.time()
+        fingerprints = fingerprints or {}
+        rows = [
+            (product['asin'], product['category'], now, now, fingerprints.get(product['asin']))
+            for product in products
+        ]
+        if not rows:
+            return
+        with self.lock:
+            for asin, _, _, _, fingerprint in rows:
+                self.last_seen[asin] = now
+                self.fingerprints[asin] = fingerprint
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO asins (asin, category, first_seen, last_seen, fingerprint) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(asin) DO UPDATE SET last_seen = excluded.last_seen, fingerprint = excluded.fingerprint",
+                    rows
+                )
+
+    def needs_enrichment(self, asin):
+        """False when the ASIN's details were fetched within the freshness window"""
+        enriched_at = self.enriched.get(asin)
+        if enriched_at is not None and time.time() - enriched_at <= self.freshness_seconds:
+            self.enrichments_skipped += 1
+            return False
+        return True
+
+    def mark_enriched(self, asin):
+        """Record that the ASIN's details were fetched now"""
+        now = time.time()
+        with self.lock:
+            self.enriched[asin] = now
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO asins (asin, first_seen, last_seen, enriched_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(asin) DO UPDATE SET enriched_at = excluded.enriched_at",
+                    (asin, now, now, now)
+                )
+
+    def stats(self):
+        return {
+            'duplicates_skipped': self.duplicates_skipped,
+            'enrichments_skipped': self.enrichments_skipped
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def open_asin_index(config=None):
+    """ASIN index configured from ASIN_INDEX_CONFIG, or None when disabled"""
+    config = config or ASIN_INDEX_CONFIG
+    if not config.get('enabled'):
+        return None
+    return AsinIndex(config['db_file'], config['freshness_hours'] * 3600)
@@ -2,6 +2,8 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import logging
+from config.credentials import BASE_URL
+from utils.metrics import metrics
 from utils.helper import Helpers  # Match your file name (helper.py instead of helpers.py)
 
 class AmazonAuth:
@@ -113,3 +115,68 @@ class AmazonAuth:
             return 'Sign in' not in account_element.text
         except:
             return False
+
+    def ensure_login(self, email, password, session_store=None):
+        """Reuse a cached session when it is still valid, otherwise log in and cache the new one"""
+        with metrics.timer('login'):
+            if session_store and self.restore_session(session_store):
+                metrics.inc('logins_total', method='session_cache')
+                return True
+            
+            if not self.login(email, password):
+                metrics.inc('logins_total', method='failed')
+                return False
+            metrics.inc('logins_total', method='form')
+            
+            if session_store:
+                session_store.save(self.driver.get_cookies())
+            return True
+
+    def restore_session(self, session_store):
+        """Load cached cookies into the driver and check they are still logged in"""
+        cookies = session_store.load()
+        if not cookies:
+            return False
+        
+        try:
+            logging.info("Restoring cached session")
+            self._set_cookies(cookies)
+            self.driver.get(BASE_URL)
+            
+            if self.check_login_status():
+                logging.info("Cached session is valid, skipping login")
+                return True
+            
+            logging.info("Cached session is stale, logging in again")
+            session_store.clear()
+            self.driver.delete_all_cookies()
+            return False
+        except Exception as e:
+            logging.error(f"Failed to restore session: {str(e)}")
+            return False
+
+    def _set_cookies(self, cookies):
+        """Set cookies without an extra page load where the browser allows it"""
+        try:
+            # Chrome can set cookies for any domain through DevTools
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setCookies', {
+                'cookies': [
+                    {
+                        'name': cookie['name'],
+                        'value': cookie['value'],
+                        'domain': cookie.get('domain'),
+                        'path': cookie.get('path', '/'),
+                        'secure': cookie.get('secure', False),
+                        'httpOnly': cookie.get('httpOnly', False),
+                        **({'expires': cookie['expiry']} if 'expiry' in cookie else {})
+                    }
+                    for cookie in cookies
+                ]
+            })
+        except Exception:
+            # WebDriver only accepts cookies for the domain currently loaded
+            self.driver.get(BASE_URL)
+            for cookie in cookies:
+                cookie = {k: v for k, v in cookie.items() if k != 'sameSite'}
+                self.driver.add_cookie(cookie)
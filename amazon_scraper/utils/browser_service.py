@@ -0,0 +1,230 @@
+import logging
+import os
+import sqlite3
+import time
+import requests
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from config.credentials import BROWSER_SERVICE_CONFIG, SELENIUM_CONFIG
+from utils.driver import block_requests, create_driver, resolve_driver_path
+from utils.metrics import metrics
+
+class ServiceState:
+    """Browser service state shared between the service and the runs attached to it"""
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS service (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                debugger_address TEXT NOT NULL,
+                generation INTEGER NOT NULL,
+                started_at REAL NOT NULL,
+                pages_served INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                generation INTEGER NOT NULL,
+                attached_at REAL NOT NULL
+            )
+        """)
+
+    def publish(self, debugger_address, generation):
+        """Announce a freshly started browser, dropping leases on the previous one"""
+        with self.conn:
+            self.conn.execute("DELETE FROM leases")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO service (id, debugger_address, generation, started_at, pages_served) "
+                "VALUES (1, ?, ?, ?, 0)",
+                (debugger_address, generation, time.time())
+            )
+
+    def withdraw(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM service")
+            self.conn.execute("DELETE FROM leases")
+
+    def current(self):
+        """The running browser as a dict, or None when no service is up"""
+        row = self.conn.execute(
+            "SELECT debugger_address, generation, started_at, pages_served FROM service WHERE id = 1"
+        ).fetchone()
+        if not row:
+            return None
+        return {'debugger_address': row[0], 'generation': row[1], 'started_at': row[2], 'pages_served': row[3]}
+
+    def acquire(self, generation, timeout_seconds):
+        """Lease the browser, or None while another run holds it; attached runs all drive the same tab"""
+        # Check and insert in one write transaction, so two runs can't both see it free
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("DELETE FROM leases WHERE attached_at < ?", (time.time() - timeout_seconds,))
+            if self.conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]:
+                lease_id = None
+            else:
+                lease_id = self.conn.execute(
+                    "INSERT INTO leases (generation, attached_at) VALUES (?, ?)", (generation, time.time())
+                ).lastrowid
+            self.conn.execute("COMMIT")
+            return lease_id
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def release(self, lease_id, pages):
+        """End a lease, counting the pages the run loaded against the browser it used"""
+        with self.conn:
+            row = self.conn.execute("SELECT generation FROM leases WHERE id = ?", (lease_id,)).fetchone()
+            self.conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+            if row:
+                self.conn.execute(
+                    "UPDATE service SET pages_served = pages_served + ? WHERE id = 1 AND generation = ?",
+                    (pages, row[0])
+                )
+
+    def active_leases(self, timeout_seconds):
+        """Number of attached runs, expiring leases of runs that never released"""
+        with self.conn:
+            self.conn.execute("DELETE FROM leases WHERE attached_at < ?", (time.time() - timeout_seconds,))
+            return self.conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class BrowserService:
+    """Long-lived warm Chrome that scraper runs attach to instead of starting their own"""
+
+    def __init__(self, config=None):
+        self.config = {**BROWSER_SERVICE_CONFIG, **(config or {})}
+        self.state = ServiceState(self.config['state_file'])
+        self.debugger_address = f"127.0.0.1:{self.config['port']}"
+        self.driver = None
+        self.generation = 0
+
+    def start(self):
+        """Launch the browser and announce it to scraper runs"""
+        self.driver = create_driver(arguments=[
+            f"--remote-debugging-port={self.config['port']}",
+            f"--user-data-dir={os.path.abspath(self.config['profile_dir'])}"
+        ])
+        self.generation += 1
+        self.state.publish(self.debugger_address, self.generation)
+        metrics.inc('browser_starts_total')
+        logging.info(f"Browser service ready at {self.debugger_address} (generation {self.generation})")
+
+    def healthy(self):
+        """True when both the WebDriver session and the debugging endpoint respond"""
+        try:
+            if self.driver.execute_script("return 1") != 1:
+                return False
+            return requests.get(f"http://{self.debugger_address}/json/version", timeout=5).ok
+        except Exception as e:
+            logging.error(f"Browser health check failed: {str(e)}")
+            return False
+
+    def recycle(self, reason):
+        """Replace the browser with a fresh one, the profile directory keeps the session"""
+        logging.info(f"Recycling browser: {reason}")
+        self.stop_browser()
+        self.start()
+
+    def stop_browser(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.error(f"Failed to quit browser: {str(e)}")
+            self.driver = None
+
+    def serve_forever(self):
+        """Keep the browser healthy until interrupted"""
+        self.start()
+        try:
+            while True:
+                time.sleep(self.config['health_interval'])
+                if not self.healthy():
+                    self.recycle("health check failed")
+                    continue
+
+                # Recycle between runs only, never under an attached scraper
+                current = self.state.current()
+                pages = current['pages_served'] if current else 0
+                if (pages >= self.config['recycle_after_pages']
+                        and not self.state.active_leases(self.config['lease_timeout_minutes'] * 60)):
+                    self.recycle(f"served {pages} pages")
+        except KeyboardInterrupt:
+            logging.info("Browser service stopping")
+        finally:
+            self.state.withdraw()
+            self.stop_browser()
+            self.state.close()
+
+
+def attach_driver(config=None):
+    """Driver attached to the running browser service, or None when there is none or another run is using it"""
+    config = {**BROWSER_SERVICE_CONFIG, **(config or {})}
+    if not config['enabled'] or not os.path.exists(config['state_file']):
+        return None
+
+    state = ServiceState(config['state_file'])
+    lease_id = None
+    try:
+        current = state.current()
+        if not current:
+            return None
+        requests.get(f"http://{current['debugger_address']}/json/version", timeout=5).raise_for_status()
+
+        # Taken before attaching, so a second run never drives the first one's tab
+        lease_id = state.acquire(current['generation'], config['lease_timeout_minutes'] * 60)
+        if lease_id is None:
+            logging.info("Warm browser is in use by another run, starting a new browser")
+            return None
+
+        chrome_options = Options()
+        chrome_options.debugger_address = current['debugger_address']
+        if SELENIUM_CONFIG['lean_profile']['report_savings']:
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        with metrics.timer('browser_attach'):
+            driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=chrome_options)
+        driver.set_page_load_timeout(SELENIUM_CONFIG['page_load_timeout'])
+        driver.implicitly_wait(SELENIUM_CONFIG['implicit_wait'])
+        if SELENIUM_CONFIG['lean_profile']['enabled']:
+            block_requests(driver, SELENIUM_CONFIG['lean_profile']['blocked_urls'])
+
+        driver.service_lease = lease_id
+        logging.info(f"Attached to warm browser at {current['debugger_address']}")
+        return driver
+    except Exception as e:
+        if lease_id is not None:
+            state.release(lease_id, 0)
+        logging.error(f"Browser service unavailable, starting a new browser: {str(e)}")
+        return None
+    finally:
+        state.close()
+
+
+def release_driver(driver, config=None):
+    """Quit a driver; an attached driver only detaches and leaves the warm browser running"""
+    lease_id = getattr(driver, 'service_lease', None)
+    if lease_id is not None:
+        config = {**BROWSER_SERVICE_CONFIG, **(config or {})}
+        state = ServiceState(config['state_file'])
+        try:
+            pages = metrics.summary()['stages'].get('navigation', {}).get('count', 0)
+            state.release(lease_id, pages)
+        except Exception as e:
+            logging.error(f"Failed to release browser lease: {str(e)}")
+        finally:
+            state.close()
+    # ChromeDriver does not close a browser it attached to through debuggerAddress
+    driver.quit()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    BrowserService().serve_forever()
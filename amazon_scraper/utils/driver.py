@@ -0,0 +1,175 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+import json
+import logging
+import os
+import time
+from config.credentials import SELENIUM_CONFIG
+from utils.metrics import metrics
+
+# Content settings the lean profile turns off (2 = block)
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.managed_default_content_settings.plugins': 2,
+    'profile.managed_default_content_settings.geolocation': 2,
+    'profile.default_content_setting_values.notifications': 2
+}
+
+# Transferred size of a page's resources, read from the Resource Timing API
+PAGE_BYTES_SCRIPT = """
+const entries = performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'));
+return entries.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+def resolve_driver_path(config=None):
+    """Path to chromedriver, looked up through webdriver-manager at most once per TTL"""
+    config = {**SELENIUM_CONFIG, **(config or {})}
+    if config['driver_path']:
+        return config['driver_path']
+    
+    cache = config['driver_cache']
+    cached = None
+    try:
+        with open(cache['file'], 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if not os.path.exists(cached['path']):
+            cached = None
+    except (OSError, ValueError, KeyError):
+        cached = None
+    
+    if cached and (cache['offline'] or time.time() - cached['resolved_at'] < cache['ttl_hours'] * 3600):
+        metrics.inc('driver_resolutions_total', source='cache')
+        return cached['path']
+    
+    try:
+        with metrics.timer('driver_resolution'):
+            path = ChromeDriverManager().install()
+    except Exception as e:
+        # Offline or rate limited, a stale driver is better than no driver
+        if cached:
+            logging.error(f"chromedriver lookup failed, using cached {cached['path']}: {str(e)}")
+            metrics.inc('driver_resolutions_total', source='stale')
+            return cached['path']
+        raise
+    
+    try:
+        os.makedirs(os.path.dirname(cache['file']) or '.', exist_ok=True)
+        tmp_path = f"{cache['file']}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'path': path, 'resolved_at': time.time()}, f)
+        os.replace(tmp_path, cache['file'])
+    except OSError as e:
+        logging.error(f"Failed to cache chromedriver path: {str(e)}")
+    metrics.inc('driver_resolutions_total', source='manager')
+    return path
+
+
+def create_driver(config=None, arguments=None):
+    """Setup Chrome driver with options"""
+    config = {**SELENIUM_CONFIG, **(config or {})}
+    chrome_options = Options()
+    for argument in arguments or []:
+        chrome_options.add_argument(argument)
+    
+    # Basic options
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    
+    # Handle WebGL and GPU errors
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-software-rasterizer')
+    chrome_options.add_argument('--disable-webgl')
+    chrome_options.add_argument('--enable-unsafe-swiftshader')
+    
+    # Handle SSL errors
+    chrome_options.add_argument('--ignore-certificate-errors')
+    chrome_options.add_argument('--ignore-ssl-errors')
+    chrome_options.add_argument('--allow-insecure-localhost')
+    
+    # Other necessary options
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-notifications')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('--start-maximized')
+    
+    # Set user agent
+    chrome_options.add_argument(f"user-agent={config['user_agent']}")
+    
+    # Remove automation flags
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    
+    if config['headless']:
+        chrome_options.add_argument('--headless=new')
+    
+    lean = config['lean_profile']
+    if lean['enabled']:
+        chrome_options.add_experimental_option('prefs', LEAN_PREFS)
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--autoplay-policy=user-gesture-required')
+        chrome_options.add_argument('--mute-audio')
+        if lean['report_savings']:
+            # Network events are needed to count the requests that were blocked
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    
+    # Initialize the driver
+    driver = webdriver.Chrome(
+        service=Service(resolve_driver_path(config)),
+        options=chrome_options
+    )
+    
+    # Set timeouts; readiness is checked explicitly per page, so the implicit wait
+    # stays at 0 and a missing optional field costs nothing
+    driver.set_page_load_timeout(config['page_load_timeout'])
+    driver.implicitly_wait(config['implicit_wait'])
+    
+    # Delete cookies
+    driver.delete_all_cookies()
+    
+    if lean['enabled']:
+        block_requests(driver, lean['blocked_urls'])
+    return driver
+
+
+def block_requests(driver, patterns):
+    """Block matching requests (fonts, media, ads, trackers) through DevTools"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        logging.error(f"Failed to enable request blocking: {str(e)}")
+
+
+def page_bandwidth(driver, config=None):
+    """Bytes transferred by the loaded page and an estimate of the bytes the lean profile saved"""
+    lean = {**SELENIUM_CONFIG['lean_profile'], **(config or {})}
+    report = {'transferred_bytes': 0, 'blocked_requests': 0, 'estimated_bytes_saved': 0}
+    try:
+        report['transferred_bytes'] = int(driver.execute_script(PAGE_BYTES_SCRIPT) or 0)
+        
+        # Match blocked requests to their resource type to estimate what they would have cost
+        resource_types = {}
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message.get('method') == 'Network.requestWillBeSent':
+                resource_types[params.get('requestId')] = params.get('type', 'Other')
+            elif message.get('method') == 'Network.loadingFailed' and params.get('blockedReason'):
+                resource_type = params.get('type') or resource_types.get(params.get('requestId'), 'Other')
+                report['blocked_requests'] += 1
+                report['estimated_bytes_saved'] += lean['estimated_sizes'].get(
+                    resource_type, lean['estimated_sizes']['Other']
+                )
+    except Exception as e:
+        logging.error(f"Failed to measure page bandwidth: {str(e)}")
+        return report
+    
+    metrics.inc('bytes_transferred_total', report['transferred_bytes'])
+    metrics.inc('requests_blocked_total', report['blocked_requests'])
+    metrics.inc('bytes_saved_estimated_total', report['estimated_bytes_saved'])
+    return report
@@ -0,0 +1,97 @@
+import logging
+import queue
+import threading
+from config.credentials import AMAZON_CREDENTIALS, SELENIUM_CONFIG, SCRAPING_CONFIG
+from utils.auth import AmazonAuth
+from utils.driver import create_driver
+from utils.fetcher import HttpFetcher
+from utils.session_store import open_session_store
+from scrapers.product_scraper import ProductScraper
+
+class DriverPool:
+    """Scrape categories in parallel, one logged in WebDriver per worker thread"""
+
+    def __init__(self, size=None, writer=None, frontier=None, page_cache=None, asin_index=None, scraper=None):
+        self.size = size or SELENIUM_CONFIG.get('pool_size', 1)
+        # Already logged in scraper of the caller, the first worker uses it instead of a new browser
+        self.scraper = scraper
+        self.writer = writer
+        self.frontier = frontier
+        self.page_cache = page_cache
+        self.asin_index = asin_index
+
+    def scrape_categories(self, categories, on_result, **scrape_kwargs):
+        """Scrape every category, calling on_result(category, products) as each one finishes"""
+        tasks = queue.Queue()
+        for category in categories:
+            tasks.put(category)
+        
+        workers = [
+            threading.Thread(
+                target=self._worker,
+                args=(worker_id, tasks, on_result, scrape_kwargs),
+                name=f"driver-worker-{worker_id}",
+                daemon=True
+            )
+            for worker_id in range(min(self.size, len(categories)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        if not tasks.empty():
+            logging.error(f"{tasks.qsize()} categories left unscraped, no driver worker available")
+
+    def _worker(self, worker_id, tasks, on_result, scrape_kwargs):
+        """Own one driver and session, and scrape categories until the queue is empty"""
+        driver = None
+        fetcher = None
+        try:
+            if worker_id == 0 and self.scraper:
+                # The caller's browser stays open, the caller releases it
+                scraper = self.scraper
+            else:
+                driver = create_driver()
+                auth = AmazonAuth(driver)
+                if not auth.ensure_login(
+                    AMAZON_CREDENTIALS['email'],
+                    AMAZON_CREDENTIALS['password'],
+                    session_store=open_session_store()
+                ):
+                    logging.error(f"Worker {worker_id} failed to login")
+                    return
+            
+                if SCRAPING_CONFIG.get('fetch_mode') == 'http':
+                    fetcher = HttpFetcher(cache=self.page_cache)
+                    fetcher.load_cookies(driver.get_cookies())
+                scraper = ProductScraper(
+                    driver,
+                    fetcher=fetcher,
+                    writer=self.writer,
+                    frontier=self.frontier,
+                    page_cache=self.page_cache,
+                    asin_index=self.asin_index
+                )
+            
+            while True:
+                try:
+                    category = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                
+                logging.info(f"Worker {worker_id} scraping category: {category['name']}")
+                try:
+                    products = scraper.scrape_category(category['url'], **scrape_kwargs)
+                    on_result(category, products)
+                except Exception as e:
+                    logging.error(f"Worker {worker_id} failed on {category['name']}: {str(e)}")
+                    
+        except Exception as e:
+            logging.error(f"Worker {worker_id} failed: {str(e)}")
+            
+        finally:
+            if fetcher:
+                fetcher.close()
+            if driver:
+                driver.quit()
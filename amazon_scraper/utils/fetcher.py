@@ -0,0 +1,95 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import logging
+import time
+from utils.metrics import metrics
+from utils.rate_controller import rate_controller
+from config.credentials import HTTP_CONFIG, SELENIUM_CONFIG
+
+class HttpFetcher:
+    """Browserless page fetcher backed by a pooled keep-alive requests.Session"""
+
+    def __init__(self, config=None, cache=None, controller=None):
+        self.config = {**HTTP_CONFIG, **(config or {})}
+        self.cache = cache
+        self.controller = controller or rate_controller
+        self.session = requests.Session()
+        
+        # One connection pool per host, each keeping up to pool_maxsize sockets alive.
+        # 429 and 503 are throttling, left to the rate controller instead of retried at once
+        retries = Retry(
+            total=self.config['max_retries'],
+            backoff_factor=self.config['backoff_factor'],
+            status_forcelist=[500, 502, 504],
+            allowed_methods=['GET']
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.config['pool_connections'],
+            pool_maxsize=self.config['pool_maxsize'],
+            pool_block=True,
+            max_retries=retries
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self.session.headers.update({
+            'User-Agent': SELENIUM_CONFIG['user_agent'],
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-IN,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+
+    def load_cookies(self, cookies):
+        """Copy cookies from a WebDriver session (driver.get_cookies()) into the HTTP session"""
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/')
+            )
+
+    def fetch(self, url, page_type='listing'):
+        """Fetch a page and return its body as bytes, or None on failure"""
+        if self.cache:
+            content = self.cache.get(url, page_type)
+            if content is not None:
+                return content
+        
+        self.controller.acquire()
+        start = time.perf_counter()
+        try:
+            with metrics.timer('http_fetch'):
+                response = self.session.get(url, timeout=self.config['timeout'])
+        except requests.RequestException as e:
+            self.controller.release(self.controller.ERROR)
+            logging.error(f"HTTP fetch failed for {url}: {str(e)}")
+            metrics.inc('http_requests_total', status='error')
+            return None
+        
+        signal = self.controller.classify(response.status_code, time.perf_counter() - start, response.content)
+        self.controller.release(signal)
+        metrics.inc('http_requests_total', status=response.status_code)
+        retries = getattr(response.raw, 'retries', None)
+        if retries and retries.history:
+            metrics.inc('retries_total', len(retries.history))
+        
+        # A robot check page must not be parsed or cached as the requested page
+        if signal == self.controller.BLOCKED:
+            logging.error(f"HTTP fetch for {url} returned a robot check page")
+            metrics.inc('page_failures_total', reason='captcha')
+            return None
+        
+        if response.status_code != 200:
+            logging.error(f"HTTP fetch for {url} returned status {response.status_code}")
+            return None
+        
+        if self.cache:
+            self.cache.put(url, response.content, page_type)
+        return response.content
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
@@ -0,0 +1,133 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from scrapers.records import PageBatch
+
+class CrawlFrontier:
+    """SQLite-backed record of which (category, page) pairs a crawl run has completed"""
+
+    PENDING = 'pending'
+    IN_FLIGHT = 'in_flight'
+    DONE = 'done'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                categories TEXT,
+                finished INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                run_id TEXT NOT NULL,
+                category_url TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                rows TEXT,
+                has_next INTEGER,
+                updated_at TEXT NOT NULL,
+                fresh INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, category_url, page)
+            );
+        """)
+        # Frontiers created before recently seen cards were counted per page
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+        if 'fresh' not in columns:
+            self.conn.execute("ALTER TABLE pages ADD COLUMN fresh INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+        # Pages in flight when the previous process died have to be fetched again
+        with self.conn:
+            reset = self.conn.execute(
+                "UPDATE pages SET status = ? WHERE status = ?",
+                (self.PENDING, self.IN_FLIGHT)
+            ).rowcount
+        if reset:
+            logging.info(f"Reset {reset} interrupted pages to pending")
+        self.run_id = None
+        # Whether start_run picked up an unfinished run instead of starting a new one
+        self.resumed = False
+
+    def start_run(self, run_id):
+        """Resume the last unfinished run if there is one, otherwise start run_id"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT run_id FROM runs WHERE finished = 0 ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+            if row:
+                self.run_id = row[0]
+                self.resumed = True
+                logging.info(f"Resuming unfinished crawl run {self.run_id}")
+            else:
+                self.run_id = run_id
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT INTO runs (run_id, started_at) VALUES (?, ?)",
+                        (run_id, datetime.now().isoformat())
+                    )
+            return self.run_id
+
+    def finish_run(self):
+        """Mark the current run complete so the next start begins a fresh one"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE runs SET finished = 1 WHERE run_id = ?", (self.run_id,))
+
+    def get_categories(self):
+        """Categories recorded for the current run, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT categories FROM runs WHERE run_id = ?", (self.run_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def set_categories(self, categories):
+        """Record the categories of the current run"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE runs SET categories = ? WHERE run_id = ?",
+                (json.dumps(categories), self.run_id)
+            )
+
+    def get_done_page(self, category_url, page):
+        """Return (rows, has_next) for a completed page, or None if it still has to be fetched"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT rows, has_next, fresh FROM pages "
+                "WHERE run_id = ? AND category_url = ? AND page = ? AND status = ?",
+                (self.run_id, category_url, page, self.DONE)
+            ).fetchone()
+        if row is None:
+            return None
+        batch = PageBatch.from_dicts(json.loads(row[0]))
+        batch.fresh = row[2]
+        return batch, bool(row[1])
+
+    def _set_status(self, category_url, page, status, rows=None, has_next=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(run_id, category_url, page, status, rows, has_next, updated_at, fresh) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.run_id, category_url, page, status,
+                    json.dumps([dict(row) for row in rows]) if rows is not None else None,
+                    has_next, datetime.now().isoformat(), getattr(rows, 'fresh', 0)
+                )
+            )
+
+    def mark_in_flight(self, category_url, page):
+        self._set_status(category_url, page, self.IN_FLIGHT)
+
+    def mark_pending(self, category_url, page):
+        self._set_status(category_url, page, self.PENDING)
+
+    def mark_done(self, category_url, page, rows, has_next):
+        self._set_status(category_url, page, self.DONE, rows, int(has_next))
+
+    def close(self):
+        self.conn.close()
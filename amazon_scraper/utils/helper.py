@@ -3,30 +3,73 @@ import random
 import json
 import pandas as pd
 import os
+import atexit
 import logging
+import logging.handlers
+import queue
+import re
 from datetime import datetime
+from config.credentials import LOGGING_CONFIG
+
+# First number in a field, with thousands separators ('₹1,29,999.00', '12,345 ratings')
+PRICE_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+COUNT_PATTERN = re.compile(r'\d[\d,]*')
+DISCOUNT_PATTERN = re.compile(r'\d+(?=\s*%)')
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record):
+        # Records stay in this process, so they need not be made picklable
+        return record
+
 
 class Helpers:
+    # Listener draining the log queue when logging is queued
+    log_listener = None
+
     @staticmethod
-    def setup_logging(log_file):
+    def setup_logging(log_file, config=None):
         """Setup logging configuration"""
+        config = {**LOGGING_CONFIG, **(config or {})}
         try:
+            if Helpers.log_listener:
+                return
+            
             # Create directory for log file if it doesn't exist
             os.makedirs(os.path.dirname(log_file), exist_ok=True)
             
+            handlers = [logging.FileHandler(log_file)]
+            if config['console']:
+                handlers.append(logging.StreamHandler())
+            formatter = logging.Formatter(config['format'])
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            
+            if config['queued']:
+                # Scraping threads only enqueue records, a listener thread does the writes
+                log_queue = queue.SimpleQueue()
+                Helpers.log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+                Helpers.log_listener.start()
+                atexit.register(Helpers.stop_logging)
+                handlers = [_DeferredQueueHandler(log_queue)]
+            
             # Configure logging
             logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s [%(levelname)s] %(message)s',
-                handlers=[
-                    logging.FileHandler(log_file),
-                    logging.StreamHandler()
-                ]
+                level=getattr(logging, config['level']),
+                handlers=handlers
             )
             logging.info("Logging setup completed")
         except Exception as e:
             print(f"Error setting up logging: {str(e)}")
 
+    @staticmethod
+    def stop_logging():
+        """Write out queued log records and stop the listener thread"""
+        if Helpers.log_listener:
+            Helpers.log_listener.stop()
+            Helpers.log_listener = None
+
     @staticmethod
     def random_delay(min_seconds=1, max_seconds=2):
         """Add random delay to avoid detection"""
@@ -34,19 +77,23 @@ class Helpers:
     
     @staticmethod
     def parse_price(price_str):
-        """Convert price string to float"""
-        try:
-            return float(''.join(filter(str.isdigit, price_str)))
-        except:
-            return 0.0
+        """Convert price string to float, keeping the decimals"""
+        match = PRICE_PATTERN.search(price_str) if isinstance(price_str, str) else None
+        return float(match.group().replace(',', '')) if match else 0.0
+    
+    @staticmethod
+    def parse_count(count_str):
+        """Convert a count such as '12,345 ratings' to int"""
+        match = COUNT_PATTERN.search(count_str) if isinstance(count_str, str) else None
+        return int(match.group().replace(',', '')) if match else 0
     
     @staticmethod
     def parse_discount(discount_str):
         """Extract discount percentage"""
-        try:
-            return int(''.join(filter(str.isdigit, discount_str)))
-        except:
+        if not isinstance(discount_str, str):
             return 0
+        match = DISCOUNT_PATTERN.search(discount_str) or COUNT_PATTERN.search(discount_str)
+        return int(match.group().replace(',', '')) if match else 0
     
     @staticmethod
     def clean_text(text):
@@ -61,11 +108,18 @@ class Helpers:
         try:
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+                json.dump(data, f, indent=4, ensure_ascii=False, default=Helpers._to_json)
             logging.info(f"Successfully saved data to JSON: {filename}")
         except Exception as e:
             logging.error(f"Error saving to JSON: {str(e)}")
     
+    @staticmethod
+    def _to_json(value):
+        """Serialize product records and other dict-like values"""
+        if hasattr(value, 'to_dict'):
+            return value.to_dict()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
     @staticmethod
     def save_to_csv(data, filename):
         """Save data to CSV file"""
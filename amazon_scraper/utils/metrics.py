@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction q of observations fall"""
+        target = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= target:
+                return bound
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.sum, 3),
+            'mean_seconds': round(self.sum / self.count, 4) if self.count else 0.0,
+            'p50_seconds': self.quantile(0.5),
+            'p95_seconds': self.quantile(0.95),
+            'max_seconds': round(self.max, 3)
+        }
+
+
+class Metrics:
+    """Process-wide stage timings, counters and gauges for a crawl run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.histograms = {}
+            self.counters = {}
+            self.gauges = {}
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block as one observation of `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def counter_total(self, name):
+        with self.lock:
+            return sum(value for (key, _), value in self.counters.items() if key == name)
+
+    def summary(self):
+        """Per-run summary: stage latencies, counters, gauges and throughput"""
+        elapsed = time.time() - self.started
+        pages = self.counter_total('pages_total')
+        products = self.counter_total('products_total')
+        with self.lock:
+            return {
+                'elapsed_seconds': round(elapsed, 3),
+                'pages_per_sec': round(pages / elapsed, 3) if elapsed else 0.0,
+                'products_per_sec': round(products / elapsed, 3) if elapsed else 0.0,
+                'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ]
+            }
+
+    def export_json(self, path):
+        """Write the run summary as JSON"""
+        _write_atomic(path, json.dumps(self.summary(), indent=4))
+
+    def export_prometheus(self, path, prefix='amazon_scraper'):
+        """Write all metrics in the Prometheus textfile collector format"""
+        lines = []
+        summary = self.summary()
+        with self.lock:
+            lines.append(f"# TYPE {prefix}_stage_seconds histogram")
+            for stage, histogram in sorted(self.histograms.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            
+            for kind, values in (('counter', self.counters), ('gauge', self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(values.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {prefix}_{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{prefix}_{name}{_format_labels(labels)} {value}")
+        
+        for name in ('pages_per_sec', 'products_per_sec'):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {summary[name]}")
+        _write_atomic(path, '\n'.join(lines) + '\n')
+
+
+def _label_key(labels):
+    # Label values are exported as strings anyway; keeping them as strings lets
+    # the keys of one metric sort even when a label mixes ints and names
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+def _write_atomic(path, content):
+    # The textfile collector may read at any time, never let it see a partial file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+# Shared registry, like the logging module's root logger
+metrics = Metrics()
@@ -0,0 +1,188 @@
+import csv
+import logging
+import os
+import threading
+from config.credentials import OUTPUT_CONFIG
+from utils.metrics import metrics
+from scrapers.records import PRODUCT_FIELDS
+
+# Columns of a listing row, in output order
+OUTPUT_FIELDS = PRODUCT_FIELDS + ['run_id']
+
+class StreamingWriter:
+    """Base for append-only output writers: dedupes rows per run and writes them in batches"""
+
+    def __init__(self, run_id, batch_size=100):
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.buffer = []
+        self.seen = set()
+        self.rows_written = 0
+        self.duplicates = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def write_rows(self, rows):
+        """Queue rows not yet written for this run, flushing once a batch is full"""
+        with self.lock:
+            for row in rows:
+                key = (row['asin'], row['category'], self.run_id)
+                if key in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(key)
+                # run_id is added by the concrete writer, rows are not copied
+                self.buffer.append(row)
+            
+            if len(self.buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            with metrics.timer('save'):
+                self._write_batch(self.buffer)
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+
+    def checkpoint(self):
+        """Write buffered rows and make everything written so far durable"""
+        with self.lock:
+            self._flush()
+            with metrics.timer('save'):
+                self._sync()
+
+    def close(self):
+        """Checkpoint and release the underlying files"""
+        if self.closed:
+            return
+        self.checkpoint()
+        self._close()
+        self.closed = True
+        logging.info(f"Wrote {self.rows_written} products to {self.target} ({self.duplicates} duplicates skipped)")
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def _sync(self):
+        pass
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StreamingCsvWriter(StreamingWriter):
+    """Append-only CSV writer that keeps its file open and writes only unseen rows in batches"""
+
+    def __init__(self, filename, run_id, batch_size=100, fieldnames=None, resume=False):
+        super().__init__(run_id, batch_size)
+        self.fieldnames = fieldnames or OUTPUT_FIELDS
+        
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        filename = self._open_target(filename, resume)
+        self.filename = self.target = filename
+        
+        file_exists = os.path.isfile(filename) and os.path.getsize(filename) > 0
+        self.file = open(filename, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if not file_exists:
+            self.writer.writerow(self.fieldnames)
+
+    def _open_target(self, filename, resume):
+        """File to append to: `filename`, or a new file next to it when its header has other columns"""
+        base, ext = os.path.splitext(filename)
+        candidate, n = filename, 0
+        while os.path.isfile(candidate) and os.path.getsize(candidate) > 0:
+            if self._load_existing(candidate, resume):
+                return candidate
+            # Appending would put values under the wrong columns
+            n += 1
+            rotated = f"{base}-{self.run_id}{ext}" if n == 1 else f"{base}-{self.run_id}-{n}{ext}"
+            logging.warning(f"{candidate} has different columns, writing to {rotated} instead")
+            candidate = rotated
+        return candidate
+
+    def _load_existing(self, filename, resume):
+        """Check the header of an existing file; on resume, read the keys it already holds for this run"""
+        with open(filename, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames != self.fieldnames:
+                return False
+            if resume and 'run_id' in self.fieldnames:
+                for row in reader:
+                    if row['run_id'] == self.run_id:
+                        self.seen.add((row['asin'], row['category'], self.run_id))
+        if self.seen:
+            logging.info(f"Resuming {filename} with {len(self.seen)} rows already written for run {self.run_id}")
+        return True
+
+    def _write_batch(self, rows):
+        fields = self.fieldnames
+        run_id = self.run_id
+        self.writer.writerows(
+            [run_id if field == 'run_id' else row.get(field, '') for field in fields]
+            for row in rows
+        )
+        self.file.flush()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _close(self):
+        self.file.close()
+
+
+class FanOutWriter:
+    """Sends every row to several output writers"""
+
+    def __init__(self, writers):
+        self.writers = writers
+
+    def write_rows(self, rows):
+        for writer in self.writers:
+            writer.write_rows(rows)
+
+    def checkpoint(self):
+        for writer in self.writers:
+            writer.checkpoint()
+
+    def close(self):
+        for writer in self.writers:
+            try:
+                writer.close()
+            except Exception as e:
+                logging.error(f"Error closing output writer: {str(e)}")
+
+
+def open_output_writer(run_id, config=None, resume=False):
+    """Open the writers for the formats listed in OUTPUT_CONFIG['formats']
+
+    resume: run_id is an interrupted run, so rows it already wrote are skipped
+    """
+    config = config or OUTPUT_CONFIG
+    writers = []
+    for output_format in config.get('formats', ['csv']):
+        if output_format == 'csv':
+            writers.append(StreamingCsvWriter(
+                os.path.join(config['directory'], config['csv_file']),
+                run_id,
+                batch_size=config.get('batch_size', 100),
+                resume=resume
+            ))
+        elif output_format == 'parquet':
+            # pyarrow is only imported when the Parquet sink is used
+            from utils.parquet_writer import PartitionedParquetWriter
+            writers.append(PartitionedParquetWriter(
+                os.path.join(config['directory'], config['parquet_dir']),
+                run_id,
+                batch_size=config.get('row_group_size', 10000)
+            ))
+        else:
+            raise ValueError(f"Unknown output format: {output_format}")
+    return writers[0] if len(writers) == 1 else FanOutWriter(writers)
@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from config.credentials import CACHE_CONFIG
+
+# Amazon tracking segments (/ref=zg_bs_nav_0) and parameters that don't change the page
+REF_SEGMENT = re.compile(r'/ref=[^/?#]*')
+IGNORED_PARAMS = {'ref', 'ref_', 'pf_rd_p', 'pf_rd_r', 'pd_rd_w', 'pd_rd_r', 'pd_rd_wg', '_encoding', 'psc', 'th'}
+
+
+def normalize_url(url):
+    """Canonical form of a URL used as cache key"""
+    parts = urlsplit(url)
+    path = REF_SEGMENT.sub('', parts.path) or '/'
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in IGNORED_PARAMS
+    ))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+class PageCache:
+    """Compressed on-disk page cache with per-page-type TTLs and LRU eviction"""
+
+    def __init__(self, directory, max_bytes, ttl):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                page_type TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self.conn.commit()
+
+    def _key(self, url):
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.html.gz")
+
+    def get(self, url, page_type):
+        """Return the cached page body, or None on a miss or an expired entry"""
+        key = self._key(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None or now - row[0] > self.ttl.get(page_type, 0):
+                if row is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            
+            try:
+                with gzip.open(self._path(key), 'rb') as f:
+                    content = f.read()
+            except OSError:
+                self._delete(key)
+                self.misses += 1
+                return None
+            
+            self.conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return content
+
+    def put(self, url, content, page_type):
+        """Store a page body, evicting least recently used entries past the size cap"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        key = self._key(url)
+        path = self._path(key)
+        with self.lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path, 'wb', compresslevel=6) as f:
+                    f.write(content)
+                now = time.time()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, url, page_type, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, url, page_type, os.path.getsize(path), now, now)
+                )
+                self.conn.commit()
+                self._evict()
+            except Exception as e:
+                logging.error(f"Error caching {url}: {str(e)}")
+
+    def _delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            self._delete(key)
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def open_page_cache(config=None):
+    """Page cache configured from CACHE_CONFIG, or None when caching is disabled"""
+    config = config or CACHE_CONFIG
+    if not config.get('enabled'):
+        return None
+    return PageCache(config['directory'], config['max_bytes'], config['ttl'])
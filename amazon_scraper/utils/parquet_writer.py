@@ -0,0 +1,91 @@
+import logging
+import os
+from datetime import datetime
+from urllib.parse import quote
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.output_writer import StreamingWriter
+
+# Typed columns stored in each file; category and crawl_date live in the partition path
+PRODUCT_SCHEMA = pa.schema([
+    ('asin', pa.string()),
+    ('name', pa.string()),
+    ('price', pa.float64()),
+    ('discount', pa.int32()),
+    ('rating', pa.string()),
+    ('num_reviews', pa.int64()),
+    ('timestamp', pa.timestamp('s')),
+    ('run_id', pa.string())
+])
+
+class PartitionedParquetWriter(StreamingWriter):
+    """Writes products as Parquet row groups, partitioned as category=<c>/crawl_date=<d>
+
+    Each checkpoint closes the open files, so everything written so far is readable;
+    rows after it go to new part-<run_id>-<n>.parquet files.
+    """
+
+    def __init__(self, directory, run_id, batch_size=10000, compression='zstd'):
+        super().__init__(run_id, batch_size)
+        self.directory = self.target = directory
+        self.compression = compression
+        # One open ParquetWriter per partition, each flush appends a row group
+        self.partition_writers = {}
+        # Number of the part files opened since the last checkpoint
+        self.part = 0
+
+    def _partition_path(self, category, crawl_date):
+        partition = os.path.join(
+            self.directory,
+            f"category={quote(category, safe='')}",
+            f"crawl_date={crawl_date}"
+        )
+        os.makedirs(partition, exist_ok=True)
+        # A resumed run keeps the parts it already wrote
+        part = self.part
+        while os.path.exists(os.path.join(partition, f"part-{self.run_id}-{part}.parquet")):
+            part += 1
+        return os.path.join(partition, f"part-{self.run_id}-{part}.parquet")
+
+    def _write_batch(self, rows):
+        partitions = {}
+        # Rows of a page share their timestamp, parse each distinct value once
+        timestamps = {}
+        for row in rows:
+            timestamp = timestamps.get(row['timestamp'])
+            if timestamp is None:
+                timestamp = timestamps[row['timestamp']] = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
+            key = (row['category'], timestamp.date().isoformat())
+            columns = partitions.setdefault(key, {name: [] for name in PRODUCT_SCHEMA.names})
+            columns['asin'].append(row['asin'])
+            columns['name'].append(row['name'])
+            columns['price'].append(float(row['price']))
+            columns['discount'].append(int(row['discount']))
+            columns['rating'].append(row['rating'])
+            columns['num_reviews'].append(int(row['num_reviews']))
+            columns['timestamp'].append(timestamp)
+            columns['run_id'].append(self.run_id)
+        
+        for key, columns in partitions.items():
+            writer = self.partition_writers.get(key)
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    self._partition_path(*key),
+                    PRODUCT_SCHEMA,
+                    compression=self.compression
+                )
+                self.partition_writers[key] = writer
+            writer.write_table(pa.Table.from_pydict(columns, schema=PRODUCT_SCHEMA))
+
+    def _sync(self):
+        # The Parquet footer is written on close, files are readable from then on
+        for key, writer in self.partition_writers.items():
+            try:
+                writer.close()
+                with open(writer.where, 'rb') as f:
+                    os.fsync(f.fileno())
+            except Exception as e:
+                logging.error(f"Error closing Parquet partition {key}: {str(e)}")
+        if self.partition_writers:
+            self.part += 1
+        self.partition_writers = {}
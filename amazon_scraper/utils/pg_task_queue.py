@@ -0,0 +1,143 @@
+import json
+import threading
+import psycopg
+from utils.task_queue import TaskQueue
+
+# Lease times come from the database clock, so workers on nodes with skewed clocks agree on expiry
+NOW = "EXTRACT(EPOCH FROM clock_timestamp())"
+
+
+class PostgresTaskQueue(TaskQueue):
+    """Task queue in PostgreSQL, for coordinators and workers on any number of nodes"""
+
+    def __init__(self, dsn, visibility_timeout=None, max_attempts=None):
+        super().__init__(visibility_timeout, max_attempts)
+        if not dsn:
+            raise ValueError("DISTRIBUTED_CONFIG['dsn'] (TASK_QUEUE_DSN) is required for the postgres backend")
+        self.lock = threading.Lock()
+        self.conn = psycopg.connect(dsn, autocommit=True)
+        with self.lock, self.conn.transaction():
+            # Serializes schema creation when several nodes start at once
+            self.conn.execute("SELECT pg_advisory_xact_lock(hashtext('amazon_scraper_task_queue'))")
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS queue_runs (
+                    run_id TEXT PRIMARY KEY,
+                    finished BOOLEAN NOT NULL DEFAULT FALSE,
+                    opened_at DOUBLE PRECISION NOT NULL DEFAULT {NOW}
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id BIGSERIAL PRIMARY KEY,
+                    run_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    task_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires DOUBLE PRECISION,
+                    result TEXT,
+                    acked BOOLEAN NOT NULL DEFAULT FALSE,
+                    updated_at DOUBLE PRECISION NOT NULL,
+                    UNIQUE (run_id, kind, task_key)
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_run_status ON tasks (run_id, status, id)")
+
+    def open_run(self, run_id):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO queue_runs (run_id) VALUES (%s) ON CONFLICT (run_id) DO NOTHING", (run_id,)
+            )
+
+    def finish_run(self, run_id):
+        with self.lock:
+            self.conn.execute("UPDATE queue_runs SET finished = TRUE WHERE run_id = %s", (run_id,))
+
+    def active_run(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT run_id FROM queue_runs WHERE NOT finished ORDER BY opened_at DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def enqueue(self, run_id, kind, task_key, payload):
+        with self.lock:
+            return self.conn.execute(
+                "INSERT INTO tasks (run_id, kind, task_key, payload, status, updated_at) "
+                f"VALUES (%s, %s, %s, %s, %s, {NOW}) "
+                "ON CONFLICT (run_id, kind, task_key) DO NOTHING",
+                (run_id, kind, task_key, json.dumps(payload), self.PENDING)
+            ).rowcount == 1
+
+    def claim(self, run_id, worker_id):
+        with self.lock, self.conn.transaction():
+            self._requeue_expired(run_id)
+            # SKIP LOCKED: concurrent workers each take a different pending row instead of
+            # queueing up behind the same one
+            row = self.conn.execute(f"""
+                UPDATE tasks SET status = %s, lease_owner = %s, lease_expires = {NOW} + %s,
+                                 attempts = attempts + 1, updated_at = {NOW}
+                WHERE id = (
+                    SELECT id FROM tasks WHERE run_id = %s AND status = %s
+                    ORDER BY id LIMIT 1 FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, kind, payload
+            """, (self.LEASED, worker_id, self.visibility_timeout, run_id, self.PENDING)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _requeue_expired(self, run_id):
+        failed = self.conn.execute(
+            f"UPDATE tasks SET status = %s, lease_owner = NULL, updated_at = {NOW} "
+            f"WHERE run_id = %s AND status = %s AND lease_expires < {NOW} AND attempts >= %s",
+            (self.FAILED, run_id, self.LEASED, self.max_attempts)
+        ).rowcount
+        requeued = self.conn.execute(
+            f"UPDATE tasks SET status = %s, lease_owner = NULL, updated_at = {NOW} "
+            f"WHERE run_id = %s AND status = %s AND lease_expires < {NOW}",
+            (self.PENDING, run_id, self.LEASED)
+        ).rowcount
+        self._log_requeued(requeued, failed)
+
+    def complete(self, task_id, worker_id, result):
+        with self.lock:
+            return self.conn.execute(
+                f"UPDATE tasks SET status = %s, result = %s, lease_owner = NULL, updated_at = {NOW} "
+                "WHERE id = %s AND status = %s AND lease_owner = %s",
+                (self.DONE, json.dumps(result), task_id, self.LEASED, worker_id)
+            ).rowcount == 1
+
+    def fail(self, task_id, worker_id):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= %s THEN %s ELSE %s END, "
+                f"lease_owner = NULL, updated_at = {NOW} WHERE id = %s AND status = %s AND lease_owner = %s",
+                (self.max_attempts, self.FAILED, self.PENDING, task_id, self.LEASED, worker_id)
+            )
+
+    def results(self, run_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, result FROM tasks "
+                "WHERE run_id = %s AND status = %s AND NOT acked ORDER BY id",
+                (run_id, self.DONE)
+            ).fetchall()
+        return [(row[0], row[1], json.loads(row[2]), json.loads(row[3])) for row in rows]
+
+    def ack(self, task_id):
+        with self.lock:
+            self.conn.execute("UPDATE tasks SET acked = TRUE WHERE id = %s", (task_id,))
+
+    def counts(self, run_id):
+        with self.lock, self.conn.transaction():
+            self._requeue_expired(run_id)
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE run_id = %s GROUP BY status", (run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
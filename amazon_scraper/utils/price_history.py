@@ -0,0 +1,185 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from config.credentials import PRICE_HISTORY_CONFIG
+from scrapers.filters import parse_rating
+
+class PriceHistory:
+    """Time series of product observations, storing a row only when price, discount or rating changed"""
+
+    # Same write_rows/checkpoint/close interface as the output writers, so listing
+    # rows and enriched rows can both be fanned out to the history
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.observed = 0
+        self.changed = 0
+        self.closed = False
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS observations (
+                asin TEXT NOT NULL,
+                category TEXT,
+                ts REAL NOT NULL,
+                price REAL,
+                discount INTEGER,
+                rating REAL,
+                num_reviews INTEGER,
+                sold_by TEXT
+            );
+            CREATE INDEX IF NOT EXISTS observations_asin_ts ON observations (asin, ts);
+            CREATE INDEX IF NOT EXISTS observations_category_ts ON observations (category, ts);
+            CREATE TABLE IF NOT EXISTS latest (
+                asin TEXT PRIMARY KEY,
+                price REAL,
+                discount INTEGER,
+                rating REAL,
+                sold_by TEXT,
+                changed_at REAL NOT NULL,
+                seen_at REAL NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+        # Every row is compared against the last stored values, kept in memory
+        self.latest = {
+            asin: (price, discount, rating)
+            for asin, price, discount, rating in self.conn.execute(
+                "SELECT asin, price, discount, rating FROM latest"
+            )
+        }
+
+    def write_rows(self, rows):
+        """Record observations, storing only those that differ from the product's last one"""
+        changed = []
+        seen = []
+        with self.lock:
+            for row in rows:
+                asin = row['asin']
+                values = (row['price'], row['discount'], parse_rating(row.get('rating')))
+                ts = self._timestamp(row)
+                sold_by = row.get('sold_by')
+                if self.latest.get(asin) == values:
+                    seen.append((sold_by, ts, asin))
+                    continue
+                self.latest[asin] = values
+                changed.append((
+                    asin, row.get('category'), ts, *values,
+                    row.get('num_reviews'), sold_by
+                ))
+            self.observed += len(rows)
+            self.changed += len(changed)
+
+            with self.conn:
+                if changed:
+                    self.conn.executemany(
+                        "INSERT INTO observations "
+                        "(asin, category, ts, price, discount, rating, num_reviews, sold_by) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        changed
+                    )
+                    self.conn.executemany(
+                        "INSERT INTO latest (asin, price, discount, rating, sold_by, changed_at, seen_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(asin) DO UPDATE SET price = excluded.price, discount = excluded.discount, "
+                        "rating = excluded.rating, sold_by = COALESCE(excluded.sold_by, latest.sold_by), "
+                        "changed_at = excluded.changed_at, seen_at = excluded.seen_at",
+                        [(row[0], row[3], row[4], row[5], row[7], row[2], row[2]) for row in changed]
+                    )
+                if seen:
+                    # Unchanged products only move their last-seen time (and pick up a seller)
+                    self.conn.executemany(
+                        "UPDATE latest SET sold_by = COALESCE(?, sold_by), seen_at = ? WHERE asin = ?",
+                        seen
+                    )
+
+    @staticmethod
+    def _timestamp(row):
+        # Resumed pages keep the time they were crawled at
+        try:
+            return datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S').timestamp()
+        except (KeyError, TypeError, ValueError):
+            return time.time()
+
+    def history(self, asin, since_hours=None):
+        """Stored observations of one product, oldest first"""
+        since = time.time() - since_hours * 3600 if since_hours else 0
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT ts, category, price, discount, rating, num_reviews, sold_by "
+                "FROM observations WHERE asin = ? AND ts >= ? ORDER BY ts",
+                (asin, since)
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def price_drops(self, category=None, hours=24, limit=20):
+        """Largest price drops recorded in the last `hours`, optionally within one category"""
+        since = time.time() - hours * 3600
+        # Candidates come from the (category, ts) index, their previous price from (asin, ts)
+        candidates = "SELECT asin FROM observations WHERE ts >= ?"
+        params = [since]
+        if category:
+            candidates += " AND category = ?"
+            params.append(category)
+        with self.lock:
+            cursor = self.conn.execute(f"""
+                SELECT asin, category, previous_price, price, previous_price - price AS price_drop,
+                       ROUND(100.0 * (previous_price - price) / previous_price, 1) AS drop_percent, ts
+                FROM (
+                    SELECT asin, category, price, ts,
+                           LAG(price) OVER (PARTITION BY asin ORDER BY ts) AS previous_price
+                    FROM observations
+                    WHERE asin IN ({candidates})
+                )
+                WHERE ts >= ? AND previous_price > price
+                ORDER BY price_drop DESC
+                LIMIT ?
+            """, (*params, since, limit))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def stats(self):
+        return {
+            'observations': self.observed,
+            'changes_stored': self.changed
+        }
+
+    def checkpoint(self):
+        pass
+
+    def close(self):
+        # Shared by the listing and enrichment outputs, so it may be closed twice
+        if self.closed:
+            return
+        self.closed = True
+        logging.info(f"Price history stored {self.changed} of {self.observed} observations")
+        self.conn.close()
+
+
+def open_price_history(config=None):
+    """Price history configured from PRICE_HISTORY_CONFIG, or None when disabled"""
+    config = config or PRICE_HISTORY_CONFIG
+    if not config.get('enabled'):
+        return None
+    return PriceHistory(config['db_file'])
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Largest recent price drops in the price history")
+    parser.add_argument('--category', help="only products in this category")
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    history = PriceHistory(PRICE_HISTORY_CONFIG['db_file'])
+    for drop in history.price_drops(args.category, args.hours, args.limit):
+        print(f"{drop['asin']}  {drop['category']}  {drop['previous_price']:.2f} -> {drop['price']:.2f} "
+              f"(-{drop['drop_percent']}%)")
+    history.close()
@@ -0,0 +1,126 @@
+import logging
+import random
+import threading
+import time
+from config.credentials import SCRAPING_CONFIG
+from utils.metrics import metrics
+
+# Markers of Amazon's robot check / CAPTCHA interstitial
+CAPTCHA_SIGNATURES = (
+    b'/errors/validateCaptcha',
+    b'Type the characters you see in this image',
+    b'api-services-support@amazon.com',
+    b'<title dir="ltr">Robot Check</title>'
+)
+
+# Same check for a page loaded in the browser, without transferring its source
+CAPTCHA_CHECK_SCRIPT = """
+return location.pathname.indexOf('validateCaptcha') !== -1
+    || document.title.indexOf('Robot Check') !== -1
+    || !!document.querySelector("form[action*='validateCaptcha'], #captchacharacters");
+"""
+
+
+def is_captcha_page(content):
+    """True when a response body is a robot check instead of the requested page"""
+    return any(signature in content for signature in CAPTCHA_SIGNATURES)
+
+
+class AdaptiveRateController:
+    """AIMD request pacing: speeds up additively while responses are healthy, backs off multiplicatively on throttling"""
+
+    OK = 'ok'
+    SLOW = 'slow'
+    THROTTLED = 'throttled'
+    BLOCKED = 'blocked'
+    ERROR = 'error'
+
+    def __init__(self, config=None):
+        self.config = {**SCRAPING_CONFIG['adaptive_rate'], **(config or {})}
+        self.enabled = self.config['enabled']
+        self.rate = self.config['initial_rps']
+        self.concurrency = self.config['initial_concurrency']
+        self.in_flight = 0
+        self.successes = 0
+        self.next_start = 0.0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+        self._publish()
+
+    def acquire(self):
+        """Block until a request may start: a concurrency slot is free and the gap since the last start has passed"""
+        if not self.enabled:
+            return
+        with self.condition:
+            while self.in_flight >= self.concurrency:
+                self.condition.wait()
+            self.in_flight += 1
+            now = time.monotonic()
+            start = max(now, self.next_start, self.paused_until)
+            # Jittered gap, so requests don't arrive on a fixed beat
+            jitter = self.config['jitter']
+            self.next_start = start + random.uniform(1 - jitter, 1 + jitter) / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, signal):
+        """Free the request's slot and adjust the rate to how the request went"""
+        if not self.enabled:
+            return
+        metrics.inc('rate_signals_total', signal=signal)
+        with self.condition:
+            self.in_flight -= 1
+            if signal == self.OK:
+                self._increase()
+            else:
+                self._decrease(signal)
+            self._publish()
+            self.condition.notify_all()
+
+    def classify(self, status=None, latency=None, content=None):
+        """Signal for a finished request from its HTTP status, latency and body"""
+        if content and is_captcha_page(content):
+            return self.BLOCKED
+        if status in (429, 503):
+            return self.THROTTLED
+        if status is not None and status >= 500:
+            return self.ERROR
+        if latency is not None and latency > self.config['slow_latency']:
+            return self.SLOW
+        return self.OK
+
+    def _increase(self):
+        self.rate = min(self.config['max_rps'], self.rate + self.config['increase_rps'])
+        # One more concurrent request per window of successes, like a congestion window
+        self.successes += 1
+        if self.successes >= self.concurrency:
+            self.successes = 0
+            self.concurrency = min(self.config['max_concurrency'], self.concurrency + 1)
+
+    def _decrease(self, signal):
+        now = time.monotonic()
+        self.successes = 0
+        if signal == self.BLOCKED:
+            self.rate = self.config['min_rps']
+            self.concurrency = self.config['min_concurrency']
+            self.paused_until = now + self.config['block_cooldown']
+            self.last_decrease = now
+            logging.warning(f"Robot check detected, pausing requests for {self.config['block_cooldown']}s")
+            return
+        # Requests already in flight report the same congestion, so back off once per interval
+        if now - self.last_decrease < self.config['decrease_interval']:
+            return
+        self.last_decrease = now
+        factor = self.config['decrease_factor']
+        self.rate = max(self.config['min_rps'], self.rate * factor)
+        self.concurrency = max(self.config['min_concurrency'], int(self.concurrency * factor))
+        logging.info(f"Backing off after {signal} response: {self.rate:.2f} req/s, concurrency {self.concurrency}")
+
+    def _publish(self):
+        metrics.set_gauge('request_rate', round(self.rate, 3))
+        metrics.set_gauge('request_concurrency', self.concurrency)
+
+
+# Shared by every fetcher and driver in the process, since they all hit the same site
+rate_controller = AdaptiveRateController()
@@ -0,0 +1,49 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # Created on first use so the lock binds to the running event loop
+        self.lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class RateLimiter:
+    """Global plus per-host request budget, each enforced by a token bucket"""
+
+    def __init__(self, global_rps, per_host_rps, burst=None):
+        self.per_host_rps = per_host_rps
+        self.burst = burst
+        self.global_bucket = TokenBucket(global_rps, burst)
+        self.host_buckets = {}
+
+    async def acquire(self, url):
+        """Wait for both the host budget and the global budget"""
+        host = urlparse(url).netloc
+        bucket = self.host_buckets.get(host)
+        if bucket is None:
+            bucket = self.host_buckets[host] = TokenBucket(self.per_host_rps, self.burst)
+        await bucket.acquire()
+        await self.global_bucket.acquire()
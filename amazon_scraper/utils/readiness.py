@@ -0,0 +1,70 @@
+import logging
+import time
+from config.credentials import SELENIUM_CONFIG
+from utils.metrics import metrics
+
+# One round trip per poll: document state plus how many of the page's anchor elements exist
+READINESS_SCRIPT = """
+const selectors = arguments[0];
+return {
+    readyState: document.readyState,
+    counts: selectors.map(selector => document.querySelectorAll(selector).length)
+};
+"""
+
+# Elements whose presence means a page type is usable
+PAGE_ANCHORS = {
+    'categories': [
+        "div._p13n-zg-nav-tree-all_style_zg-browse-group__88fbz a",
+        "div[role='treeitem'] a"
+    ],
+    'listing': ["div[data-asin]"],
+    'product': ["#productTitle", "#merchant-info", "#productDescription", "#feature-bullets"]
+}
+
+
+class PageReadiness:
+    """Polls explicit per-page-type conditions instead of sleeping for a fixed time"""
+
+    def __init__(self, driver, config=None):
+        self.driver = driver
+        self.config = {**SELENIUM_CONFIG['readiness'], **(config or {})}
+
+    def _poll(self, page_type):
+        state = self.driver.execute_script(READINESS_SCRIPT, PAGE_ANCHORS.get(page_type, []))
+        return state['readyState'], state['counts']
+
+    def wait(self, page_type):
+        """Wait until the loaded page is ready, returns False when the wait budget runs out"""
+        budget = self.config['budget'].get(page_type, self.config['budget']['default'])
+        poll_interval = self.config['poll_interval']
+        deadline = time.monotonic() + budget
+        last_count = None
+        stable_polls = 0
+        
+        with metrics.timer('readiness_wait'):
+            while True:
+                try:
+                    ready_state, counts = self._poll(page_type)
+                except Exception as e:
+                    logging.error(f"Readiness check failed: {str(e)}")
+                    ready_state, counts = None, []
+                
+                if page_type == 'listing':
+                    # Cards render in batches, ready once the count stops growing
+                    count = counts[0] if counts else 0
+                    stable_polls = stable_polls + 1 if count and count == last_count else 0
+                    last_count = count
+                    if stable_polls >= self.config['stable_polls'] or (count and ready_state == 'complete'):
+                        return True
+                elif counts:
+                    if any(counts):
+                        return True
+                elif ready_state == 'complete':
+                    return True
+                
+                if time.monotonic() >= deadline:
+                    logging.error(f"Page not ready after {budget}s ({page_type})")
+                    metrics.inc('readiness_timeouts_total', page_type=page_type)
+                    return False
+                time.sleep(poll_interval)
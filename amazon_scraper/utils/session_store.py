@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+import time
+from config.credentials import SESSION_CONFIG
+
+class SessionStore:
+    """Saves authenticated browser cookies to disk so new drivers can skip the login form"""
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+    def save(self, cookies):
+        """Store cookies from driver.get_cookies()"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            # Cookies grant account access, keep the file private to the user
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'cookies': cookies}, f)
+            os.replace(tmp_path, self.path)
+            logging.info(f"Saved {len(cookies)} session cookies")
+        except Exception as e:
+            logging.error(f"Error saving session cookies: {str(e)}")
+
+    def load(self):
+        """Return the stored cookies, or None if missing or older than the TTL"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"Error reading session cookies: {str(e)}")
+            return None
+        
+        age = time.time() - session['saved_at']
+        if age > self.ttl_seconds:
+            logging.info(f"Cached session expired ({age / 3600:.1f} h old)")
+            return None
+        return session['cookies']
+
+    def clear(self):
+        """Forget the stored session"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def open_session_store(config=None):
+    """Session store configured from SESSION_CONFIG"""
+    config = config or SESSION_CONFIG
+    return SessionStore(config['cookie_file'], config['ttl_hours'] * 3600)
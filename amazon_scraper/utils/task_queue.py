@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from config.credentials import DISTRIBUTED_CONFIG
+
+class TaskQueue:
+    """Work queue shared by a coordinator and its workers, with leased tasks
+
+    The coordinator opens a run, enqueues tasks and reads their results; workers claim
+    tasks and complete or fail them. A worker holds a task for visibility_timeout seconds;
+    when the lease expires without the task being completed, it becomes pending again
+    for any worker, until it has used up max_attempts.
+    """
+
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, visibility_timeout=None, max_attempts=None):
+        self.visibility_timeout = visibility_timeout or DISTRIBUTED_CONFIG['visibility_timeout']
+        self.max_attempts = max_attempts or DISTRIBUTED_CONFIG['max_attempts']
+
+    def open_run(self, run_id):
+        raise NotImplementedError
+
+    def finish_run(self, run_id):
+        raise NotImplementedError
+
+    def active_run(self):
+        """The run workers should serve, or None when the coordinator has finished"""
+        raise NotImplementedError
+
+    def enqueue(self, run_id, kind, task_key, payload):
+        """Add a task; a task with the same key in the run is only ever queued once"""
+        raise NotImplementedError
+
+    def claim(self, run_id, worker_id):
+        """Lease the oldest pending task to worker_id, returns (task_id, kind, payload) or None"""
+        raise NotImplementedError
+
+    def complete(self, task_id, worker_id, result):
+        """Store a task's result; ignored when the lease was lost to another worker"""
+        raise NotImplementedError
+
+    def fail(self, task_id, worker_id):
+        """Give a task back, it is retried until it runs out of attempts"""
+        raise NotImplementedError
+
+    def results(self, run_id):
+        """Completed tasks the coordinator has not acknowledged yet, as (task_id, kind, payload, result)"""
+        raise NotImplementedError
+
+    def ack(self, task_id):
+        raise NotImplementedError
+
+    def counts(self, run_id):
+        """Number of tasks per status in the run"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _log_requeued(self, requeued, failed):
+        if requeued or failed:
+            logging.info(f"Re-queued {requeued} expired tasks, {failed} failed after {self.max_attempts} attempts")
+
+
+class SqliteTaskQueue(TaskQueue):
+    """Task queue in a SQLite file, for processes on one host and for tests"""
+
+    def __init__(self, db_path, visibility_timeout=None, max_attempts=None, journal_mode=None):
+        super().__init__(visibility_timeout, max_attempts)
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        # WAL coordinates through shared memory, so every process must be on this host
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode or DISTRIBUTED_CONFIG['journal_mode']}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS queue_runs (
+                run_id TEXT PRIMARY KEY,
+                finished INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                task_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                acked INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                UNIQUE (run_id, kind, task_key)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id);
+        """)
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same task
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    def open_run(self, run_id):
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO queue_runs (run_id) VALUES (?)", (run_id,))
+
+    def finish_run(self, run_id):
+        with self.lock:
+            self.conn.execute("UPDATE queue_runs SET finished = 1 WHERE run_id = ?", (run_id,))
+
+    def active_run(self):
+        """The run workers should serve, or None when the coordinator has finished"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT run_id FROM queue_runs WHERE finished = 0 ORDER BY rowid DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def enqueue(self, run_id, kind, task_key, payload):
+        """Add a task; a task with the same key in the run is only ever queued once"""
+        with self.lock:
+            return self.conn.execute(
+                "INSERT OR IGNORE INTO tasks (run_id, kind, task_key, payload, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, kind, task_key, json.dumps(payload), self.PENDING, time.time())
+            ).rowcount == 1
+
+    def claim(self, run_id, worker_id):
+        """Lease the oldest pending task to worker_id, returns (task_id, kind, payload) or None"""
+        now = time.time()
+        with self.lock:
+            self._transaction()
+            try:
+                self._requeue_expired(now)
+                row = self.conn.execute(
+                    "SELECT id, kind, payload FROM tasks WHERE run_id = ? AND status = ? ORDER BY id LIMIT 1",
+                    (run_id, self.PENDING)
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (self.LEASED, worker_id, now + self.visibility_timeout, now, row[0])
+                    )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _requeue_expired(self, now):
+        # Tasks of workers that died or stalled go back to pending, or fail for good
+        # once they have used up their attempts
+        failed = self.conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (self.FAILED, now, self.LEASED, now, self.max_attempts)
+        ).rowcount
+        requeued = self.conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (self.PENDING, now, self.LEASED, now)
+        ).rowcount
+        self._log_requeued(requeued, failed)
+
+    def complete(self, task_id, worker_id, result):
+        """Store a task's result; ignored when the lease was lost to another worker"""
+        with self.lock:
+            return self.conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (self.DONE, json.dumps(result), time.time(), task_id, self.LEASED, worker_id)
+            ).rowcount == 1
+
+    def fail(self, task_id, worker_id):
+        """Give a task back, it is retried until it runs out of attempts"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_owner = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (self.max_attempts, self.FAILED, self.PENDING, time.time(), task_id, self.LEASED, worker_id)
+            )
+
+    def results(self, run_id):
+        """Completed tasks the coordinator has not acknowledged yet, as (task_id, kind, payload, result)"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, result FROM tasks "
+                "WHERE run_id = ? AND status = ? AND acked = 0 ORDER BY id",
+                (run_id, self.DONE)
+            ).fetchall()
+        return [(row[0], row[1], json.loads(row[2]), json.loads(row[3])) for row in rows]
+
+    def ack(self, task_id):
+        with self.lock:
+            self.conn.execute("UPDATE tasks SET acked = 1 WHERE id = ?", (task_id,))
+
+    def counts(self, run_id):
+        """Number of tasks per status in the run"""
+        with self.lock:
+            self._transaction()
+            try:
+                self._requeue_expired(time.time())
+                rows = self.conn.execute(
+                    "SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status", (run_id,)
+                ).fetchall()
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_task_queue(config=None):
+    """TaskQueue for the backend selected in DISTRIBUTED_CONFIG"""
+    config = {**DISTRIBUTED_CONFIG, **(config or {})}
+    if config['backend'] == 'postgres':
+        # Only needed by fleets spanning several nodes
+        from utils.pg_task_queue import PostgresTaskQueue
+        return PostgresTaskQueue(config['dsn'], config['visibility_timeout'], config['max_attempts'])
+    return SqliteTaskQueue(
+        config['queue_file'],
+        config['visibility_timeout'],
+        config['max_attempts'],
+        config['journal_mode']
+    )